@@ -5,6 +5,8 @@ A comprehensive tool for evaluating and prioritizing AI use cases
 
 import streamlit as st
 import pandas as pd
+import numpy as np
+import io
 import json
 import os
 from datetime import datetime
@@ -21,14 +23,40 @@ st.set_page_config(
 )
 
 # Import custom modules
-from utils.framework_loader import load_framework_data, get_categories
-from utils.database import Database
-from utils.ai_insights import generate_insights
+from utils.framework_loader import load_framework
+from utils.ranking import OVERALL, get_portfolio, rank_use_cases, top_k
+from utils.sensitivity import WeightSensitivity
+from utils.uncertainty import get_uncertainty
+from utils.importer import import_use_cases
+from utils.exports import EXPORT_MIME_TYPES, build_assessment_exports, write_portfolio_export
+from utils.reports import get_report_job, submit_report
+from utils.database import Database, INSIGHTS_PENDING
+from utils.ai_insights import InsightStream, enqueue_insights, get_insight_cache, is_insight_job_active
 from utils.calculations import calculate_scores, calculate_category_scores
 
 # Initialize database
 db = Database()
 
+# Maximum number of use cases shown for a Dashboard search
+SEARCH_RESULT_LIMIT = 100
+
+# Use cases shown in the What-If top list
+WHAT_IF_TOP_K = 20
+
+# Sort orders of the full What-If table: result array and whether higher values come first
+WHAT_IF_SORT_ORDERS = {
+    "Rank": ('rank', False),
+    "Rank Change": ('rank_change', True),
+    "Score Change": ('score_change', True),
+    "Default Rank": ('baseline_rank', False),
+}
+
+# Dashboard portfolio export formats by label
+PORTFOLIO_EXPORT_FORMATS = {"CSV": 'csv', "JSON Lines": 'jsonl', "Parquet": 'parquet'}
+
+# Printable report formats by label
+REPORT_FORMAT_LABELS = {"PDF": 'pdf', "Excel": 'xlsx'}
+
 # Custom CSS
 st.markdown("""
 <style>
@@ -89,7 +117,7 @@ def main():
     st.sidebar.title("🤖 AI Prioritization")
     page = st.sidebar.radio(
         "Navigation",
-        ["🏠 Home", "📊 Dashboard", "➕ New Use Case", "📝 Assessment", "📈 Results", "ℹ️ About"]
+        ["🏠 Home", "📊 Dashboard", "➕ New Use Case", "📝 Assessment", "📈 Results", "🎛️ What-If", "ℹ️ About"]
     )
     
     # Route to appropriate page
@@ -103,6 +131,8 @@ def main():
         show_assessment()
     elif page == "📈 Results":
         show_results()
+    elif page == "🎛️ What-If":
+        show_what_if()
     elif page == "ℹ️ About":
         show_about()
 
@@ -174,68 +204,282 @@ def show_home():
     st.markdown("---")
     
     # Quick stats
-    use_cases = db.get_all_use_cases()
+    stats = db.get_portfolio_stats()
     st.markdown("### 📈 Quick Stats")
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric("Total Use Cases", len(use_cases))
+        st.metric("Total Use Cases", stats['total'])
     with col2:
-        completed = len([uc for uc in use_cases if uc['status'] == 'completed'])
-        st.metric("Completed Assessments", completed)
+        st.metric("Completed Assessments", stats['completed'])
     with col3:
-        if completed > 0:
-            summaries = [db.get_assessment_summary(uc['id']) for uc in use_cases if uc['status'] == 'completed']
-            avg_score = sum(s['normalized_score'] for s in summaries if s) / len(summaries)
-            st.metric("Average Score", f"{avg_score:.0f}/100")
+        if stats['average_score'] is not None:
+            st.metric("Average Score", f"{stats['average_score']:.0f}/100")
         else:
             st.metric("Average Score", "N/A")
+    
+    if stats['assessed'] > 1:
+        st.caption(
+            f"Median {stats['median_score']:.0f} · "
+            f"Interquartile range {stats['p25_score']}–{stats['p75_score']} · "
+            f"Top 10% scoring {stats['p90_score']}+"
+        )
 
 def show_dashboard():
     """Display dashboard with all use cases"""
     st.markdown('<h1 class="main-header">📊 Dashboard</h1>', unsafe_allow_html=True)
     
-    use_cases = db.get_all_use_cases()
+    total_use_cases = db.get_use_case_count()
     
-    if not use_cases:
+    if not total_use_cases:
         st.info("No use cases yet. Create your first use case to get started!")
         if st.button("➕ Create New Use Case"):
             st.session_state.page = "➕ New Use Case"
             st.rerun()
         return
     
+    list_tab, ranking_tab = st.tabs(["📋 All Use Cases", "🏆 Rankings"])
+    with list_tab:
+        show_use_case_list(total_use_cases)
+    with ranking_tab:
+        show_rankings()
+    
+    show_portfolio_export(total_use_cases)
+
+def show_portfolio_export(total_use_cases):
+    """Display the whole-portfolio export"""
+    with st.expander("📤 Export Portfolio"):
+        st.caption("Every use case with its assessment summary and dimension scores. "
+                   "CSV and Parquet have one row per use case; JSON Lines also keeps score ranges.")
+        col1, col2 = st.columns(2)
+        with col1:
+            file_format = PORTFOLIO_EXPORT_FORMATS[st.selectbox(
+                "Format", list(PORTFOLIO_EXPORT_FORMATS), key="portfolio_export_format"
+            )]
+        with col2:
+            compress = st.checkbox("Compress (gzip)", key="portfolio_export_gzip",
+                                   disabled=file_format == 'parquet',
+                                   help="Parquet files are always compressed")
+        compress = compress and file_format != 'parquet'
+        
+        # The file is built on request and kept until the data or the options change
+        export_key = (db.cache.version, file_format, compress)
+        if st.session_state.get('portfolio_export_key') != export_key:
+            st.session_state.portfolio_export = None
+            st.session_state.portfolio_export_key = export_key
+        
+        if st.session_state.portfolio_export is None:
+            if st.button("📦 Prepare Portfolio Export"):
+                progress = st.progress(0.0, text="Exporting...")
+                buffer = io.BytesIO()
+                try:
+                    report = write_portfolio_export(
+                        db, buffer, file_format, compress=compress,
+                        progress=lambda count: progress.progress(
+                            min(count / total_use_cases, 1.0), text=f"Exported {count:,} of {total_use_cases:,}"
+                        )
+                    )
+                except ImportError as e:
+                    st.error(str(e))
+                    return
+                
+                file_name = f"portfolio_{datetime.now():%Y%m%d_%H%M%S}.{file_format}"
+                st.session_state.portfolio_export = {
+                    'file_name': f"{file_name}.gz" if compress else file_name,
+                    'data': buffer.getvalue(),
+                    'mime': 'application/gzip' if compress else EXPORT_MIME_TYPES[file_format]
+                }
+                st.session_state.portfolio_export_seconds = report['seconds']
+                st.rerun()
+        else:
+            export = st.session_state.portfolio_export
+            st.download_button("⬇️ Download Portfolio", **export)
+            st.caption(f"{export['file_name']} · {len(export['data']) / 1024:,.0f} KB, "
+                       f"exported in {st.session_state.portfolio_export_seconds:.1f}s")
+
+def show_use_case_list(total_use_cases):
+    """Display the searchable, paginated list of use cases"""
+    # Search and filters
+    with st.expander("🔎 Search & Filter", expanded=False):
+        query = st.text_input("Search", placeholder="Name, description, business unit, owner or ID")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            status = st.selectbox("Status", ["Any", "draft", "completed"])
+        with col2:
+            business_unit = st.selectbox("Business Unit", ["Any"] + db.get_business_units())
+        with col3:
+            score_range = st.slider("Score Range", 0, 100, (0, 100))
+    
+    filtering_scores = score_range != (0, 100)
+    if query.strip() or status != "Any" or business_unit != "Any" or filtering_scores:
+        results = db.search_use_cases(
+            query=query,
+            status=None if status == "Any" else status,
+            business_unit=None if business_unit == "Any" else business_unit,
+            min_score=score_range[0] if filtering_scores else None,
+            max_score=score_range[1] if filtering_scores else None,
+            limit=SEARCH_RESULT_LIMIT
+        )
+        st.markdown(f"### Matching Use Cases ({len(results)}{'+' if len(results) == SEARCH_RESULT_LIMIT else ''})")
+        if not results:
+            st.info("No use cases match your search.")
+        for uc in results:
+            show_use_case_card(uc)
+        return
+    
     # Display use cases
-    st.markdown(f"### Your Use Cases ({len(use_cases)})")
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        st.markdown(f"### Your Use Cases ({total_use_cases})")
+    with col2:
+        page_size = st.selectbox("Per page", [10, 20, 50, 100], index=1, key="dashboard_page_size")
+    
+    # Keyset pagination: remember the cursor that starts each visited page
+    if st.session_state.get('dashboard_cursor_page_size') != page_size:
+        st.session_state.dashboard_cursors = [None]
+        st.session_state.dashboard_cursor_page_size = page_size
+    cursors = st.session_state.dashboard_cursors
+    
+    cursor = cursors[-1] or (None, None)
+    use_cases, next_cursor = db.get_use_cases_page(cursor[0], cursor[1], page_size)
+    
+    if not use_cases and len(cursors) > 1:
+        # The page emptied (e.g. after deletes); step back
+        cursors.pop()
+        st.rerun()
     
     for uc in use_cases:
-        with st.expander(f"**{uc['use_case_id']}** - {uc['name']}", expanded=False):
-            col1, col2 = st.columns([3, 1])
-            
-            with col1:
-                st.markdown(f"**Description:** {uc.get('description', 'N/A')}")
-                st.markdown(f"**Business Unit:** {uc.get('business_unit', 'N/A')}")
-                st.markdown(f"**Process Owner:** {uc.get('process_owner', 'N/A')}")
-                st.markdown(f"**Status:** {uc['status'].title()}")
-            
-            with col2:
-                if uc['status'] == 'completed':
-                    summary = db.get_assessment_summary(uc['id'])
-                    if summary:
-                        st.markdown(f'<div class="metric-card"><div class="score-display">{summary["normalized_score"]}</div><div>Overall Score</div></div>', unsafe_allow_html=True)
-                        if st.button("📈 View Results", key=f"view_{uc['id']}"):
-                            st.session_state.selected_use_case_id = uc['id']
-                            st.session_state.page = "📈 Results"
-                            st.rerun()
-                else:
-                    if st.button("📝 Start Assessment", key=f"assess_{uc['id']}"):
-                        st.session_state.selected_use_case_id = uc['id']
-                        st.session_state.page = "📝 Assessment"
-                        st.rerun()
-                
-                if st.button("🗑️ Delete", key=f"delete_{uc['id']}"):
-                    db.delete_use_case(uc['id'])
-                    st.success("Use case deleted!")
+        show_use_case_card(uc)
+    
+    # Page navigation
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if len(cursors) > 1:
+            st.button("⬅️ Previous", on_click=cursors.pop)
+    with col2:
+        st.markdown(f"Page {len(cursors)} of {-(-total_use_cases // page_size)}")
+    with col3:
+        if next_cursor:
+            st.button("Next ➡️", on_click=cursors.append, args=(next_cursor,))
+
+def show_rankings():
+    """Display the portfolio ranked by overall or category score"""
+    framework = load_framework()
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        rank_by = st.selectbox("Rank by", ["Overall Score"] + list(framework.categories), key="ranking_by")
+    with col2:
+        k = st.selectbox("Show top", [10, 20, 50, 100], index=1, key="ranking_top_k")
+    
+    by = OVERALL if rank_by == "Overall Score" else rank_by
+    show_uncertainty = by == OVERALL and st.checkbox(
+        "🎲 Show uncertainty",
+        key="ranking_uncertainty",
+        help="Simulate the recorded score ranges to show score intervals and how likely each use case is to stay in the top group"
+    )
+    ranked = rank_use_cases(db, by=by, k=k, framework=framework)
+    if not ranked:
+        st.info("No completed assessments to rank yet.")
+        return
+    
+    ranking_df = pd.DataFrame([
+        {
+            'Rank': uc['rank'],
+            'ID': uc['use_case_id'],
+            'Name': uc['name'],
+            'Business Unit': uc['business_unit'],
+            'Score': uc['score'],
+            'Overall Score': uc['normalized_score']
+        }
+        for uc in ranked
+    ])
+    if by == OVERALL:
+        ranking_df = ranking_df.drop(columns=['Overall Score'])
+    
+    if show_uncertainty:
+        uncertainty = get_uncertainty(db, top_k=k, framework=framework)
+        intervals = [uncertainty.get(uc['id']) for uc in ranked]
+        ranking_df[f"{uncertainty.confidence:.0%} Interval"] = [
+            f"{i['low']}–{i['high']}" if i else "" for i in intervals
+        ]
+        ranking_df[f"P(Top {k})"] = [f"{i['p_top_k']:.0%}" if i else "" for i in intervals]
+        st.caption(
+            f"{uncertainty.samples:,} simulated samples · "
+            f"use cases with score ranges: {uncertainty.uncertain_use_cases}"
+        )
+    
+    st.dataframe(ranking_df, use_container_width=True, hide_index=True)
+    st.caption("Ties are broken by overall score, then weighted total, then the oldest use case.")
+    
+    with st.expander("🖨️ Printable Report"):
+        st.caption(f"One report covering the {len(ranked)} use cases above.")
+        show_report_controls([uc['id'] for uc in ranked], "rankings")
+
+def show_report_controls(use_case_ids, key):
+    """Display report generation for some use cases and the status of the last report job"""
+    file_format = REPORT_FORMAT_LABELS[st.selectbox(
+        "Report format", list(REPORT_FORMAT_LABELS), key=f"report_format_{key}"
+    )]
+    
+    # Jobs run in a background process pool; the page only polls their status
+    jobs = st.session_state.setdefault('report_jobs', {})
+    if st.button("🖨️ Generate Report", key=f"report_generate_{key}"):
+        try:
+            jobs[key] = submit_report(db, use_case_ids, file_format)
+        except ValueError as e:
+            st.error(str(e))
+    
+    job = get_report_job(jobs[key]) if key in jobs else None
+    if job is None:
+        return
+    if job['status'] in ('queued', 'running'):
+        st.info(f"⏳ Rendering {job['file_name']} ({job['status']}, {job['seconds']:.0f}s). Refresh to check for the result.")
+        if st.button("🔄 Refresh", key=f"report_refresh_{key}"):
+            st.rerun()
+    elif job['status'] == 'failed':
+        st.error(f"Report generation failed: {job['error']}")
+    else:
+        st.download_button(f"⬇️ Download {job['file_name']}", data=job['data'], file_name=job['file_name'],
+                           mime=job['mime'], key=f"report_download_{key}")
+        if job['cached']:
+            st.caption("Unchanged since the last report, so the cached copy was used.")
+
+def show_use_case_card(uc):
+    """Display one use case row; assessment details are loaded only on request"""
+    with st.expander(f"**{uc['use_case_id']}** - {uc['name']}", expanded=False):
+        col1, col2 = st.columns([3, 1])
+        
+        with col1:
+            st.markdown(f"**Description:** {uc.get('description', 'N/A')}")
+            st.markdown(f"**Business Unit:** {uc.get('business_unit', 'N/A')}")
+            st.markdown(f"**Process Owner:** {uc.get('process_owner', 'N/A')}")
+            st.markdown(f"**Status:** {uc['status'].title()}")
+        
+        with col2:
+            if uc['status'] == 'completed' and uc.get('normalized_score') is not None:
+                st.markdown(f'<div class="metric-card"><div class="score-display">{uc["normalized_score"]}</div><div>Overall Score</div></div>', unsafe_allow_html=True)
+                if st.button("📈 View Results", key=f"view_{uc['id']}"):
+                    st.session_state.selected_use_case_id = uc['id']
+                    st.session_state.page = "📈 Results"
+                    st.rerun()
+            else:
+                if st.button("📝 Start Assessment", key=f"assess_{uc['id']}"):
+                    st.session_state.selected_use_case_id = uc['id']
+                    st.session_state.page = "📝 Assessment"
                     st.rerun()
+            
+            if st.button("🗑️ Delete", key=f"delete_{uc['id']}"):
+                db.delete_use_case(uc['id'])
+                st.success("Use case deleted!")
+                st.rerun()
+        
+        # Category breakdown is fetched only when the user asks for it
+        if uc.get('normalized_score') is not None and st.toggle("Show category breakdown", key=f"details_{uc['id']}"):
+            summary = db.get_assessment_summary(uc['id'])
+            if summary:
+                for cat, data in summary['category_scores'].items():
+                    st.progress(data['normalized'] / 100, text=f"{cat} - {data['normalized']}/100")
 
 def show_new_use_case():
     """Create new use case form"""
@@ -272,6 +516,31 @@ def show_new_use_case():
             if st.button("Start Assessment Now", type="primary"):
                 st.session_state.page = "📝 Assessment"
                 st.rerun()
+    
+    # Bulk import
+    st.markdown("---")
+    with st.expander("📥 Import Use Cases from a File"):
+        st.markdown(
+            "Upload a CSV or JSON Lines file with `use_case_id` and `name` "
+            "(plus optional `description`, `business_unit` and `process_owner`). "
+            "Existing use cases with the same ID are updated."
+        )
+        uploaded = st.file_uploader("Use case file", type=["csv", "jsonl"])
+        if uploaded is not None and st.button("📥 Import", type="primary"):
+            with st.spinner("Importing use cases..."):
+                report = import_use_cases(db, uploaded)
+            
+            st.success(
+                f"Imported {report['rows'] - report['rejected']:,} of {report['rows']:,} rows: "
+                f"{report['inserted']:,} new, {report['updated']:,} updated, {report['unchanged']:,} unchanged."
+            )
+            if report['rejected']:
+                st.warning(f"{report['rejected']:,} rows were rejected.")
+                st.dataframe(
+                    pd.DataFrame(report['rejections'], columns=['Line', 'Problem']),
+                    use_container_width=True,
+                    hide_index=True
+                )
 
 def show_assessment():
     """Show assessment form"""
@@ -295,8 +564,8 @@ def show_assessment():
     st.markdown("---")
     
     # Load framework data
-    framework = load_framework_data()
-    categories = get_categories(framework)
+    framework = load_framework()
+    categories = framework.categories
     
     # Initialize session state for scores
     if 'assessment_scores' not in st.session_state:
@@ -304,6 +573,18 @@ def show_assessment():
         st.session_state.assessment_scores = {
             score['dimension']: score['score'] for score in existing_scores
         }
+        st.session_state.assessment_ranges = {
+            score['dimension']: (score['score_low'], score['score_high'])
+            for score in existing_scores
+            if score.get('score_low') is not None
+        }
+    st.session_state.setdefault('assessment_ranges', {})
+    
+    uncertainty_mode = st.toggle(
+        "🎲 Uncertainty mode",
+        value=bool(st.session_state.get('assessment_ranges')),
+        help="Give a plausible range for dimensions you are unsure about"
+    )
     
     # Progress tracking
     total_dimensions = len(framework)
@@ -318,7 +599,7 @@ def show_assessment():
     # Assessment by category
     for category in categories:
         with st.expander(f"📋 {category}", expanded=(category == categories[0])):
-            dimensions = [d for d in framework if d['category'] == category]
+            dimensions = framework.by_category[category]
             
             for dim in dimensions:
                 st.markdown(f"#### {dim['dimension']}")
@@ -338,44 +619,69 @@ def show_assessment():
                 if score:
                     st.session_state.assessment_scores[dim['dimension']] = score
                 
+                if uncertainty_mode and score:
+                    low, high = st.select_slider(
+                        "Plausible range:",
+                        options=[1, 2, 3, 4, 5],
+                        value=st.session_state.assessment_ranges.get(dim['dimension'], (score, score)),
+                        key=f"range_{dim['dimension']}"
+                    )
+                    # The range always contains the selected score
+                    low, high = min(low, score), max(high, score)
+                    if low == high:
+                        st.session_state.assessment_ranges.pop(dim['dimension'], None)
+                    else:
+                        st.session_state.assessment_ranges[dim['dimension']] = (low, high)
+                
                 st.markdown("---")
     
     # Submit button
     if completed == total_dimensions:
+        stream_insights = st.checkbox(
+            "⚡ Stream AI insights on the Results page",
+            value=True,
+            help="Show the analysis as it is written instead of generating it in the background"
+        )
         if st.button("✅ Submit Assessment", type="primary", use_container_width=True):
             # Save scores
             scores_data = []
+            ranges = st.session_state.assessment_ranges if uncertainty_mode else {}
             for dim in framework:
+                score_low, score_high = ranges.get(dim['dimension'], (None, None))
                 scores_data.append({
                     'dimension': dim['dimension'],
                     'category': dim['category'],
                     'score': st.session_state.assessment_scores[dim['dimension']],
-                    'weight': dim['default_weight']
+                    'weight': dim['default_weight'],
+                    'score_low': score_low,
+                    'score_high': score_high
                 })
             
             # Calculate results
             total_score, normalized_score = calculate_scores(scores_data)
             category_scores = calculate_category_scores(scores_data)
             
-            # Generate AI insights
-            with st.spinner("Generating AI-powered insights..."):
-                insights, recommendations = generate_insights(
-                    use_case=use_case,
-                    scores=scores_data,
-                    normalized_score=normalized_score,
-                    category_scores=category_scores
-                )
-            
-            # Save to database
+            # Save to database; AI insights are streamed on the Results page
+            # or filled in by a background worker
             db.save_assessment(
                 use_case_id=use_case['id'],
                 scores=scores_data,
                 total_score=total_score,
                 normalized_score=normalized_score,
                 category_scores=category_scores,
-                ai_insights=insights,
-                recommendations=recommendations
+                insights_status=INSIGHTS_PENDING
             )
+            if stream_insights:
+                st.session_state.stream_insights_for = use_case['id']
+            else:
+                enqueue_insights(
+                    db,
+                    use_case=use_case,
+                    scores=scores_data,
+                    normalized_score=normalized_score,
+                    category_scores=category_scores,
+                    framework=framework
+                )
             
             st.success("Assessment completed successfully!")
             st.session_state.page = "📈 Results"
@@ -394,7 +700,7 @@ def show_results():
     
     use_case = db.get_use_case(st.session_state.selected_use_case_id)
     summary = db.get_assessment_summary(use_case['id'])
-    scores = db.get_assessment_scores(use_case['id'])
+    scores = load_framework().sort_scores(db.get_assessment_scores(use_case['id']))
     
     if not summary:
         st.warning("No assessment results found for this use case.")
@@ -429,6 +735,18 @@ def show_results():
         st.metric("Status", status)
         st.metric("Assessed On", summary['created_at'].strftime("%Y-%m-%d"))
     
+    # Score uncertainty from the recorded plausible ranges
+    if any(score.get('score_low') is not None for score in scores):
+        uncertainty = get_uncertainty(db)
+        interval = uncertainty.get(use_case['id'])
+        if interval:
+            st.info(
+                f"🎲 Given the recorded score ranges, the overall score has a "
+                f"{uncertainty.confidence:.0%} interval of {interval['low']}–{interval['high']} "
+                f"(median {interval['median']}), and a {interval['p_top_k']:.0%} chance of "
+                f"ranking in the portfolio's top {uncertainty.top_k}."
+            )
+    
     st.markdown("---")
     
     # Category scores
@@ -499,13 +817,59 @@ def show_results():
     st.markdown("---")
     
     # AI Insights
-    if summary.get('ai_insights'):
+    if summary.get('insights_status') == INSIGHTS_PENDING:
+        st.markdown("### 🤖 AI-Powered Analysis")
+        if st.session_state.get('stream_insights_for') == use_case['id']:
+            del st.session_state.stream_insights_for
+            stream = InsightStream(
+                use_case=use_case,
+                scores=scores,
+                normalized_score=summary['normalized_score'],
+                category_scores=summary['category_scores'],
+                framework=load_framework(),
+                cache=get_insight_cache(db)
+            )
+            st.write_stream(stream)
+            db.update_insights(use_case['id'], stream.insights, stream.recommendations,
+                               summary_id=summary['id'])
+            st.rerun()
+        elif is_insight_job_active(use_case['id']):
+            st.info("AI insights are being generated in the background. Refresh to check for results.")
+            if st.button("🔄 Refresh"):
+                st.rerun()
+        else:
+            st.warning("AI insights were not generated for this assessment.")
+            if st.button("🤖 Generate AI Insights"):
+                enqueue_insights(
+                    db,
+                    use_case=use_case,
+                    scores=scores,
+                    normalized_score=summary['normalized_score'],
+                    category_scores=summary['category_scores'],
+                    framework=load_framework()
+                )
+                st.rerun()
+    elif summary.get('ai_insights'):
         st.markdown("### 🤖 AI-Powered Analysis")
         st.markdown(f"""
         <div style="background: grey; padding: 1.5rem; border-radius: 10px; border-left: 4px solid #2196f3;">
             {summary['ai_insights']}
         </div>
         """, unsafe_allow_html=True)
+        
+        if st.button("🔁 Regenerate AI Insights", help="Ask the model again instead of reusing cached insights"):
+            db.update_insights(use_case['id'], summary['ai_insights'], summary['recommendations'],
+                               insights_status=INSIGHTS_PENDING)
+            enqueue_insights(
+                db,
+                use_case=use_case,
+                scores=scores,
+                normalized_score=summary['normalized_score'],
+                category_scores=summary['category_scores'],
+                framework=load_framework(),
+                use_cache=False
+            )
+            st.rerun()
     
     st.markdown("---")
     
@@ -532,23 +896,133 @@ def show_results():
     
     # Export options
     st.markdown("### 📥 Export")
-    col1, col2 = st.columns(2)
+    compress = st.checkbox("Compress downloads (gzip)", key="export_gzip",
+                           help="Smaller files for large exports; open with any unzip tool")
+    
+    # Files are built on request and kept until the assessment or the format changes
+    export_key = (use_case['id'], summary['id'], summary.get('updated_at'),
+                  summary.get('insights_status'), compress)
+    if st.session_state.get('export_key') != export_key:
+        st.session_state.export_files = None
+        st.session_state.export_key = export_key
+    
+    if st.session_state.export_files is None:
+        if st.button("📦 Prepare Export"):
+            st.session_state.export_files = build_assessment_exports(
+                use_case,
+                {k: v for k, v in summary.items() if k != 'created_at'},
+                scores,
+                scores_df,
+                compress=compress
+            )
+            st.rerun()
+    else:
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.download_button("📄 Download CSV", **st.session_state.export_files['csv'])
+        
+        with col2:
+            st.download_button("📊 Download JSON", **st.session_state.export_files['json'])
     
+    st.markdown("### 🖨️ Printable Report")
+    show_report_controls([use_case['id']], f"use_case_{use_case['id']}")
+
+def show_what_if():
+    """Display what-if analysis of dimension weight changes"""
+    st.markdown('<h1 class="main-header">🎛️ What-If Analysis</h1>', unsafe_allow_html=True)
+    st.markdown("Adjust dimension weights to see how every assessed use case's score and rank would change.")
+    
+    framework = load_framework()
+    portfolio = get_portfolio(db, framework)
+    if not len(portfolio):
+        st.info("No completed assessments yet. Complete an assessment to explore weight changes.")
+        return
+    
+    # Rebuild the model when the portfolio changes, keeping the adjusted weights
+    model_key = (db.cache.version, framework)
+    previous_key = st.session_state.get('what_if_key')
+    if previous_key != model_key:
+        model = WeightSensitivity(portfolio)
+        if previous_key is not None and previous_key[1] == framework:
+            for j, (_, weight) in st.session_state.what_if_model.changed_weights().items():
+                model.set_weight(j, weight)
+        st.session_state.what_if_key = model_key
+        st.session_state.what_if_model = model
+    model = st.session_state.what_if_model
+    
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        dimension = st.selectbox("Dimension", [dim['dimension'] for dim in framework], key="what_if_dimension")
+    j = framework.positions[dimension]
+    with col2:
+        weight = st.slider("Weight", 0, 20, model.weights[j].item(), key=f"what_if_weight_{j}")
+    model.set_weight(j, weight)
+    
+    changed = model.changed_weights()
+    if changed:
+        st.caption("Changed weights: " + ", ".join(
+            f"{framework[k]['dimension']} {old} → {new}" for k, (old, new) in changed.items()
+        ))
+        st.button("↩️ Reset Weights", on_click=reset_what_if_weights)
+    
+    results = model.results()
+    ids = results['use_case_ids']
+    
+    def results_table(indices):
+        rows = []
+        for i in indices:
+            use_case = db.get_use_case(ids[i].item())
+            rows.append({
+                'Rank': results['rank'][i].item(),
+                'Rank Change': results['rank_change'][i].item(),
+                'ID': use_case['use_case_id'] if use_case else '',
+                'Name': use_case['name'] if use_case else '',
+                'Score': results['score'][i].item(),
+                'Score Change': results['score_change'][i].item(),
+                'Default Score': results['baseline_score'][i].item()
+            })
+        return pd.DataFrame(rows)
+    
+    col1, col2 = st.columns([3, 2])
     with col1:
-        if st.button("📄 Export to CSV"):
-            scores_df.to_csv(f"assessment_{use_case['use_case_id']}.csv", index=False)
-            st.success("Exported to CSV!")
+        st.markdown("### 🏆 Top Use Cases")
+        top = top_k(results['score'], WHAT_IF_TOP_K, tie_breakers=(results['baseline_score'],), ids=ids)
+        st.dataframe(results_table(top), use_container_width=True, hide_index=True)
+    with col2:
+        st.markdown("### 🔀 Biggest Movers")
+        movers = top_k(abs(results['rank_change']), WHAT_IF_TOP_K // 2, ids=ids)
+        movers = [i for i in movers if results['rank_change'][i] != 0]
+        if movers:
+            st.dataframe(results_table(movers)[['ID', 'Name', 'Rank', 'Rank Change', 'Score Change']],
+                         use_container_width=True, hide_index=True)
+        else:
+            st.info("No rank changes with the current weights.")
     
+    # Every use case, re-ranked; only the shown page is looked up in the database
+    st.markdown(f"### 📋 All Use Cases ({len(ids)})")
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        sort_by = st.selectbox("Sort by", list(WHAT_IF_SORT_ORDERS), key="what_if_sort")
     with col2:
-        if st.button("📊 Export to JSON"):
-            export_data = {
-                'use_case': use_case,
-                'summary': {k: v for k, v in summary.items() if k != 'created_at'},
-                'scores': scores
-            }
-            with open(f"assessment_{use_case['use_case_id']}.json", 'w') as f:
-                json.dump(export_data, f, indent=2)
-            st.success("Exported to JSON!")
+        page_size = st.selectbox("Per page", [20, 50, 100, 500], index=1, key="what_if_page_size")
+    pages = -(-len(ids) // page_size)
+    with col3:
+        page = st.number_input("Page", 1, pages, 1, key=f"what_if_page_{page_size}_{pages}") if pages > 1 else 1
+    
+    column, descending = WHAT_IF_SORT_ORDERS[sort_by]
+    values = -results[column] if descending else results[column]
+    # Ties keep the new ranking order, then the oldest use case first
+    order = np.lexsort((ids, results['rank'], values))
+    st.dataframe(results_table(order[(page - 1) * page_size:page * page_size]),
+                 use_container_width=True, hide_index=True)
+    st.caption(f"Page {page} of {pages}. Rank changes are positive when a use case moves up.")
+
+def reset_what_if_weights():
+    """Restore default weights in the what-if model and its sliders"""
+    st.session_state.what_if_model.reset()
+    for key in [key for key in st.session_state if key.startswith('what_if_weight_')]:
+        del st.session_state[key]
 
 def show_about():
     """Display about page"""
@@ -598,6 +1072,7 @@ def show_about():
     - ✅ AI-powered insights and recommendations
     - ✅ Interactive visualizations
     - ✅ Export results to CSV/JSON
+    - ✅ Printable PDF and Excel reports
     - ✅ SQLite database for data persistence
     
     ---
@@ -0,0 +1,54 @@
+"""
+Tests for the OpenAI client's circuit breaker handling of streamed responses
+"""
+
+import pytest
+
+from utils import openai_client
+from utils.openai_client import CircuitBreaker, _WatchedStream
+
+@pytest.fixture
+def breaker(monkeypatch):
+    """A fresh breaker with a half-open trial in flight"""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    monkeypatch.setattr(openai_client, 'breaker', breaker)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert not breaker.allow()
+    return breaker
+
+def test_stream_closed_mid_way_releases_trial(breaker):
+    stream = _WatchedStream(iter(['a', 'b', 'c']))
+    assert next(stream) == 'a'
+    stream.close()
+    assert breaker.allow()
+
+def test_generator_closed_mid_stream_releases_trial(breaker):
+    def render(chunks):
+        for chunk in chunks:
+            yield chunk
+    
+    rendered = render(_WatchedStream(iter(['a', 'b', 'c'])))
+    assert next(rendered) == 'a'
+    rendered.close()
+    assert breaker.allow()
+
+def test_unread_stream_releases_trial(breaker):
+    stream = _WatchedStream(iter(['a']))
+    del stream
+    assert breaker.allow()
+
+def test_finished_stream_closes_breaker(breaker):
+    assert list(_WatchedStream(iter(['a', 'b']))) == ['a', 'b']
+    assert breaker.state == 'closed'
+
+def test_failed_stream_reopens_breaker(breaker):
+    def chunks():
+        yield 'a'
+        raise ConnectionError("dropped")
+    
+    stream = _WatchedStream(chunks())
+    with pytest.raises(ConnectionError):
+        list(stream)
+    assert breaker._opened_at is not None
+    assert not breaker._trial_in_flight
@@ -0,0 +1,70 @@
+"""
+Tests for background report rendering
+"""
+
+import os
+import signal
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from utils import reports
+from utils.calculations import calculate_category_scores, calculate_scores
+from utils.database import Database
+from utils.framework_loader import load_framework
+
+@pytest.fixture
+def db(tmp_path):
+    """A database with one assessed use case"""
+    db = Database(tmp_path / 'reports.db')
+    use_case_id = db.create_use_case('UC-001', 'Invoice Matching')
+    scores = [
+        {'dimension': dim['dimension'], 'category': dim['category'], 'score': 3,
+         'weight': dim['default_weight']}
+        for dim in load_framework()
+    ]
+    db.save_assessment(use_case_id, scores, *calculate_scores(scores), calculate_category_scores(scores))
+    return db, use_case_id
+
+@pytest.fixture
+def fresh_pool():
+    """Start and finish each test without a worker pool"""
+    reports._executor = None
+    yield
+    if reports._executor is not None:
+        reports._executor.shutdown(wait=False, cancel_futures=True)
+        reports._executor = None
+
+def test_submit_after_broken_pool_uses_fresh_pool(db, fresh_pool, monkeypatch):
+    db, use_case_id = db
+    monkeypatch.setattr(reports, '_cached_report', lambda key: None)
+    
+    executor = reports._get_executor()
+    # Start the workers, then kill them: every later submit on this pool raises
+    executor.submit(os.getpid).result(timeout=60)
+    for process in list(executor._processes.values()):
+        os.kill(process.pid, signal.SIGKILL)
+        process.join()
+    with pytest.raises(BrokenProcessPool):
+        executor.submit(os.getpid).result(timeout=60)
+    
+    job_id = reports.submit_report(db, [use_case_id], 'xlsx')
+    reports._jobs[job_id]['future'].result(timeout=120)
+    assert reports.get_report_job(job_id)['status'] == 'done'
+    assert reports._executor is not executor
+
+def test_unavailable_pool_fails_the_job(db, fresh_pool, monkeypatch):
+    db, use_case_id = db
+    
+    class BrokenExecutor:
+        def submit(self, *args):
+            raise BrokenProcessPool("worker died")
+        
+        def shutdown(self, **kwargs):
+            pass
+    
+    monkeypatch.setattr(reports, '_get_executor', BrokenExecutor)
+    monkeypatch.setattr(reports, '_cached_report', lambda key: None)
+    job = reports.get_report_job(reports.submit_report(db, [use_case_id], 'xlsx'))
+    assert job['status'] == 'failed'
+    assert 'worker died' in job['error']
@@ -4,37 +4,138 @@ AI Insights Generator - Uses OpenAI to generate insights and recommendations
 
 import os
 import json
-from openai import OpenAI
+import hashlib
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
-def generate_insights(use_case, scores, normalized_score, category_scores):
+from utils.database import INSIGHTS_FAILED
+from utils.openai_client import CircuitOpenError, RateLimiter, chat_completion
+
+# Number of background threads generating insights for submitted assessments
+INSIGHT_WORKERS = int(os.getenv('INSIGHT_WORKERS', '2'))
+
+# Insight cache settings: entries expire after the TTL (seconds) and the least
+# recently used entries are evicted beyond the maximum size
+INSIGHT_CACHE_TTL = float(os.getenv('INSIGHT_CACHE_TTL', str(7 * 24 * 3600)))
+INSIGHT_CACHE_MAX_ENTRIES = int(os.getenv('INSIGHT_CACHE_MAX_ENTRIES', '1000'))
+
+# Default parallelism for generate_insights_batch
+INSIGHT_BATCH_CONCURRENCY = int(os.getenv('INSIGHT_BATCH_CONCURRENCY', '4'))
+
+# Rough completion size used to budget tokens per request
+ESTIMATED_COMPLETION_TOKENS = 400
+
+MODEL = "gpt-4o-mini"
+
+# Separates the analysis text from the JSON recommendations in streamed responses
+RECOMMENDATIONS_MARKER = "---RECOMMENDATIONS---"
+SYSTEM_PROMPT = "You are an AI strategy consultant specializing in enterprise AI implementation."
+
+_executor = None
+_active_jobs = {}
+_jobs_lock = threading.Lock()
+_caches = {}
+
+class InsightCache:
     """
-    Generate AI-powered insights and recommendations
+    Persistent cache of generated insights, keyed on a hash of the prompt
+    
+    Entries live in the insight_cache table of the assessments database, so
+    they survive restarts and are shared by every session. Hit and miss
+    counters are kept per process.
+    """
+    
+    def __init__(self, db, ttl=INSIGHT_CACHE_TTL, max_entries=INSIGHT_CACHE_MAX_ENTRIES):
+        """
+        Args:
+            db: Database holding the insight_cache table
+            ttl: Seconds an entry stays valid (None for no expiry)
+            max_entries: Maximum number of entries kept (LRU eviction)
+        """
+        self.db = db
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(prompt, model=MODEL, system_prompt=SYSTEM_PROMPT):
+        """Hash everything that determines the model's answer"""
+        payload = json.dumps([model, system_prompt, prompt])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def get(self, key):
+        """Get cached (insights, recommendations) or None"""
+        cached = self.db.get_cached_insight(key, max_age=self.ttl)
+        with self._lock:
+            if cached is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return cached
+    
+    def put(self, key, insights, recommendations):
+        """Store a generated result"""
+        self.db.put_cached_insight(key, insights, recommendations, max_entries=self.max_entries)
+    
+    def clear(self):
+        """Remove every cached entry"""
+        self.db.clear_insight_cache()
+    
+    def stats(self):
+        """Get hit/miss counters for this process"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+def get_insight_cache(db):
+    """Get the shared InsightCache for a database"""
+    with _jobs_lock:
+        cache = _caches.get(db.pool.db_path)
+        if cache is None:
+            cache = _caches[db.pool.db_path] = InsightCache(db)
+        return cache
+
+def build_insight_prompt(use_case, scores, normalized_score, category_scores, framework=None,
+                         streaming=False):
+    """
+    Build the analysis prompt for a use case assessment
     
     Args:
         use_case: Use case dictionary
         scores: List of score dictionaries
         normalized_score: Overall normalized score (0-100)
         category_scores: Dictionary of category scores
+        framework: Optional Framework used to order dimensions consistently
+        streaming: Ask for plain-text analysis followed by the recommendations
+            as JSON after RECOMMENDATIONS_MARKER, instead of a single JSON object
     
     Returns:
-        tuple: (insights_text, recommendations_list)
+        str: Prompt text
     """
+    # Prepare data for analysis, strongest/weakest first with ties in framework order
+    if framework is not None:
+        scores = framework.sort_scores(scores)
+    strengths = sorted((s for s in scores if s['score'] >= 4), key=lambda s: -s['score'])
+    challenges = sorted((s for s in scores if s['score'] <= 2), key=lambda s: s['score'])
     
-    # Check if OpenAI API key is available
-    api_key = os.getenv('OPENAI_API_KEY')
-    
-    if not api_key:
-        return get_default_insights(normalized_score, category_scores)
+    if streaming:
+        response_format = f"""Write the analysis as plain text first. Then, on its own line, write
+{RECOMMENDATIONS_MARKER}
+followed by the recommendations as a JSON array of strings."""
+    else:
+        response_format = """Format your response as JSON:
+{
+  "insights": "your analysis here",
+  "recommendations": ["recommendation 1", "recommendation 2", "recommendation 3"]
+}"""
     
-    try:
-        client = OpenAI(api_key=api_key)
-        
-        # Prepare data for analysis
-        strengths = [s for s in scores if s['score'] >= 4]
-        challenges = [s for s in scores if s['score'] <= 2]
-        
-        # Create prompt
-        prompt = f"""Analyze this AI use case assessment and provide insights:
+    return f"""Analyze this AI use case assessment and provide insights:
 
 Use Case: {use_case['name']}
 Description: {use_case.get('description', 'N/A')}
@@ -53,17 +154,51 @@ Provide:
 1. A concise analysis of the overall readiness and viability (2-3 sentences)
 2. Top 3 specific, actionable recommendations to improve this use case's score
 
-Format your response as JSON:
-{{
-  "insights": "your analysis here",
-  "recommendations": ["recommendation 1", "recommendation 2", "recommendation 3"]
-}}"""
-        
-        # Call OpenAI API
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
+{response_format}"""
+
+def generate_insights(use_case, scores, normalized_score, category_scores, framework=None,
+                      cache=None, use_cache=True):
+    """
+    Generate AI-powered insights and recommendations
+    
+    Args:
+        use_case: Use case dictionary
+        scores: List of score dictionaries
+        normalized_score: Overall normalized score (0-100)
+        category_scores: Dictionary of category scores
+        framework: Optional Framework used to order dimensions consistently
+        cache: Optional InsightCache consulted before calling the API
+        use_cache: Set to False to bypass cache lookups (fresh results are
+            still written back to the cache)
+    
+    Returns:
+        tuple: (insights_text, recommendations_list)
+    """
+    
+    # Check if OpenAI API key is available
+    api_key = os.getenv('OPENAI_API_KEY')
+    
+    if not api_key:
+        return get_default_insights(normalized_score, category_scores)
+    
+    # Create prompt
+    prompt = build_insight_prompt(use_case, scores, normalized_score, category_scores, framework)
+    
+    cache_key = None
+    if cache is not None:
+        cache_key = cache.make_key(prompt)
+        if use_cache:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+    
+    try:
+        # Call OpenAI API through the shared client
+        response = chat_completion(
+            api_key,
+            model=MODEL,
             messages=[
-                {"role": "system", "content": "You are an AI strategy consultant specializing in enterprise AI implementation."},
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
             response_format={"type": "json_object"},
@@ -75,12 +210,267 @@ Format your response as JSON:
         insights = result.get('insights', '')
         recommendations = result.get('recommendations', [])
         
-        return insights, recommendations
+        if cache_key is not None:
+            cache.put(cache_key, insights, recommendations)
         
+        return insights, recommendations
+    
+    except CircuitOpenError:
+        # The API has been failing; fall back without waiting on it
+        return get_default_insights(normalized_score, category_scores)
     except Exception as e:
         print(f"Error generating AI insights: {e}")
         return get_default_insights(normalized_score, category_scores)
 
+def generate_insights_batch(items, max_concurrency=INSIGHT_BATCH_CONCURRENCY, requests_per_minute=None,
+                            tokens_per_minute=None, framework=None, cache=None, use_cache=True):
+    """
+    Generate insights for many assessments in parallel
+    
+    Requests fan out over a bounded thread pool, throttled by an optional
+    requests/tokens per minute budget. Items with identical prompts share a
+    single request. Items are read lazily, so a generator of any length can be
+    passed in.
+    
+    Args:
+        items: Iterable of dictionaries with 'use_case', 'scores',
+            'normalized_score' and 'category_scores' keys
+        max_concurrency: Maximum number of requests in flight
+        requests_per_minute: Optional request rate limit
+        tokens_per_minute: Optional token rate limit (prompt tokens estimated
+            from its length, plus a fixed completion allowance)
+        framework: Optional Framework used to order dimensions consistently
+        cache: Optional InsightCache shared by all items
+        use_cache: Set to False to bypass cache lookups
+    
+    Yields:
+        tuple: (index, insights_text, recommendations_list) in completion
+            order, where index is the item's position in ``items``; items that
+            fail fall back to get_default_insights
+    """
+    limiter = None
+    if requests_per_minute or tokens_per_minute:
+        limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+    
+    items = enumerate(items)
+    exhausted = False
+    waiting = {}    # prompt key -> [(index, item)] waiting on one request
+    pending = {}    # future -> prompt key
+    finished = {}   # prompt key -> result, for duplicates arriving later
+    
+    pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='insights-batch')
+    try:
+        while True:
+            # Keep the pool busy without reading the whole input up front
+            while not exhausted and len(pending) < max_concurrency * 2:
+                try:
+                    index, item = next(items)
+                except StopIteration:
+                    exhausted = True
+                    break
+                
+                prompt = build_insight_prompt(
+                    item['use_case'], item['scores'], item['normalized_score'],
+                    item['category_scores'], framework
+                )
+                key = InsightCache.make_key(prompt)
+                
+                if key in finished:
+                    yield (index,) + finished[key]
+                elif key in waiting:
+                    waiting[key].append((index, item))
+                else:
+                    waiting[key] = [(index, item)]
+                    future = pool.submit(
+                        _generate_batch_item, item, prompt, limiter, framework, cache, use_cache
+                    )
+                    pending[future] = key
+            
+            if not pending:
+                break
+            
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = pending.pop(future)
+                group = waiting.pop(key)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Error generating AI insights in batch: {e}")
+                    result = None
+                
+                if result is not None:
+                    finished[key] = result
+                for index, item in group:
+                    if result is None:
+                        yield (index,) + get_default_insights(item['normalized_score'], item['category_scores'])
+                    else:
+                        yield (index,) + tuple(result)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def _generate_batch_item(item, prompt, limiter, framework, cache, use_cache):
+    """Batch worker body: serve from cache, else wait for rate budget and call the API"""
+    if cache is not None and use_cache and os.getenv('OPENAI_API_KEY'):
+        cached = cache.get(cache.make_key(prompt))
+        if cached is not None:
+            return cached
+    
+    if limiter is not None and os.getenv('OPENAI_API_KEY'):
+        limiter.acquire(tokens=len(prompt) // 4 + ESTIMATED_COMPLETION_TOKENS)
+    
+    return generate_insights(
+        use_case=item['use_case'],
+        scores=item['scores'],
+        normalized_score=item['normalized_score'],
+        category_scores=item['category_scores'],
+        framework=framework,
+        cache=cache,
+        use_cache=False
+    )
+
+class InsightStream:
+    """
+    Insight generation consumed incrementally
+    
+    Iterating yields the analysis text in chunks as the model produces it, so
+    it can be rendered before the response is complete. Once iteration ends,
+    ``insights`` and ``recommendations`` hold the final result (the
+    recommendations are parsed from the JSON that follows the analysis).
+    Falls back to get_default_insights like generate_insights does; if the
+    stream breaks after text was yielded, the final result comes from
+    generate_insights instead of the truncated text.
+    """
+    
+    def __init__(self, use_case, scores, normalized_score, category_scores, framework=None,
+                 cache=None, use_cache=True):
+        """
+        Args:
+            use_case: Use case dictionary
+            scores: List of score dictionaries
+            normalized_score: Overall normalized score (0-100)
+            category_scores: Dictionary of category scores
+            framework: Optional Framework used to order dimensions consistently
+            cache: Optional InsightCache (shared with non-streamed results)
+            use_cache: Set to False to bypass cache lookups
+        """
+        self.use_case = use_case
+        self.scores = scores
+        self.normalized_score = normalized_score
+        self.category_scores = category_scores
+        self.framework = framework
+        self.cache = cache
+        self.use_cache = use_cache
+        self.insights = None
+        self.recommendations = None
+    
+    def __iter__(self):
+        api_key = os.getenv('OPENAI_API_KEY')
+        if not api_key:
+            yield from self._finish_with(*get_default_insights(self.normalized_score, self.category_scores))
+            return
+        
+        # Key on the regular prompt so streamed and background results share entries
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(build_insight_prompt(
+                self.use_case, self.scores, self.normalized_score, self.category_scores, self.framework
+            ))
+            if self.use_cache:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    yield from self._finish_with(*cached)
+                    return
+        
+        prompt = build_insight_prompt(
+            self.use_case, self.scores, self.normalized_score, self.category_scores,
+            self.framework, streaming=True
+        )
+        
+        text = ''
+        emitted = 0
+        marker_at = -1
+        response = None
+        try:
+            response = chat_completion(
+                api_key,
+                model=MODEL,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.7,
+                stream=True
+            )
+            
+            for chunk in response:
+                if not chunk.choices:
+                    continue
+                text += chunk.choices[0].delta.content or ''
+                if marker_at >= 0:
+                    continue
+                
+                marker_at = text.find(RECOMMENDATIONS_MARKER)
+                # Hold back a possible partial marker at the end of the text
+                end = marker_at if marker_at >= 0 else len(text) - len(RECOMMENDATIONS_MARKER) + 1
+                if end > emitted:
+                    yield text[emitted:end]
+                    emitted = end
+        
+        except Exception as e:
+            if not isinstance(e, CircuitOpenError):
+                print(f"Error streaming AI insights: {e}")
+            if not emitted:
+                yield from self._finish_with(*get_default_insights(self.normalized_score, self.category_scores))
+                return
+            # Part of the analysis was already shown; don't keep a truncated
+            # result, redo it with the regular (non-streamed) request instead
+            self.insights, self.recommendations = generate_insights(
+                self.use_case, self.scores, self.normalized_score, self.category_scores,
+                self.framework, cache=self.cache, use_cache=self.use_cache
+            )
+            return
+        finally:
+            # Closed early (e.g. a rerun): release the breaker's trial right away
+            if response is not None:
+                response.close()
+        
+        if marker_at < 0:
+            # No recommendations section: the whole response is analysis
+            if len(text) > emitted:
+                yield text[emitted:]
+            self.insights = text.strip()
+            self.recommendations = get_default_insights(self.normalized_score, self.category_scores)[1]
+            return
+        
+        self.insights = text[:marker_at].strip()
+        self.recommendations = _parse_recommendations(text[marker_at + len(RECOMMENDATIONS_MARKER):])
+        if self.recommendations is None:
+            self.recommendations = get_default_insights(self.normalized_score, self.category_scores)[1]
+        elif cache_key is not None:
+            self.cache.put(cache_key, self.insights, self.recommendations)
+    
+    def _finish_with(self, insights, recommendations):
+        """Complete the stream with an already known result"""
+        self.insights = insights
+        self.recommendations = recommendations
+        yield insights
+
+def _parse_recommendations(text):
+    """Parse the JSON array after the recommendations marker, or None if malformed"""
+    text = text.strip()
+    if text.startswith('```'):
+        text = text.strip('`')
+        if text.startswith('json'):
+            text = text[len('json'):]
+    try:
+        recommendations = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(recommendations, list):
+        return None
+    return [str(r) for r in recommendations]
+
 def get_default_insights(normalized_score, category_scores):
     """Generate default insights when AI is not available"""
     
@@ -113,3 +503,74 @@ def get_default_insights(normalized_score, category_scores):
     
     return insights, recommendations
 
+def _get_executor():
+    """Lazily create the process-wide insight worker pool"""
+    global _executor
+    with _jobs_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=INSIGHT_WORKERS, thread_name_prefix='insights')
+        return _executor
+
+def enqueue_insights(db, use_case, scores, normalized_score, category_scores, framework=None,
+                     use_cache=True):
+    """
+    Generate insights for a saved assessment in the background
+    
+    The assessment must already be saved (typically with insights_status
+    'pending'); the worker fills in its summary when the model returns.
+    
+    Args:
+        db: Database holding the saved summary
+        use_case: Use case dictionary
+        scores: List of score dictionaries
+        normalized_score: Overall normalized score (0-100)
+        category_scores: Dictionary of category scores
+        framework: Optional Framework used to order dimensions consistently
+        use_cache: Set to False to regenerate even if a cached result exists
+    
+    Returns:
+        Future: Resolves to True once the summary has been updated
+    """
+    summary = db.get_assessment_summary(use_case['id'])
+    summary_id = summary['id'] if summary else None
+    
+    future = _get_executor().submit(
+        _run_insight_job, db, summary_id, use_case, scores, normalized_score, category_scores,
+        framework, use_cache
+    )
+    with _jobs_lock:
+        _active_jobs[use_case['id']] = future
+    future.add_done_callback(lambda f: _forget_job(use_case['id'], f))
+    return future
+
+def _forget_job(use_case_id, future):
+    """Drop a finished job from the active job registry"""
+    with _jobs_lock:
+        if _active_jobs.get(use_case_id) is future:
+            del _active_jobs[use_case_id]
+
+def is_insight_job_active(use_case_id):
+    """Check whether insights for a use case are being generated in this process"""
+    with _jobs_lock:
+        return use_case_id in _active_jobs
+
+def _run_insight_job(db, summary_id, use_case, scores, normalized_score, category_scores,
+                     framework, use_cache):
+    """Worker body: generate insights and store them on the summary"""
+    try:
+        insights, recommendations = generate_insights(
+            use_case=use_case,
+            scores=scores,
+            normalized_score=normalized_score,
+            category_scores=category_scores,
+            framework=framework,
+            cache=get_insight_cache(db),
+            use_cache=use_cache
+        )
+    except Exception as e:
+        print(f"Error in background insight generation: {e}")
+        return db.update_insights(use_case['id'], '', [], summary_id=summary_id,
+                                  insights_status=INSIGHTS_FAILED)
+    
+    return db.update_insights(use_case['id'], insights, recommendations, summary_id=summary_id)
+
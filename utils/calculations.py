@@ -2,6 +2,96 @@
 Calculations utility - Score calculations and aggregations
 """
 
+from collections import namedtuple
+
+import numpy as np
+
+# Highest score a dimension can receive
+MAX_DIMENSION_SCORE = 5
+
+# Results of score_portfolio; every field is a NumPy array with one row per use case
+PortfolioScores = namedtuple('PortfolioScores', [
+    'totals',               # (use_cases,) weighted totals
+    'max_totals',           # (use_cases,) highest achievable weighted totals
+    'normalized',           # (use_cases,) totals scaled to 0-100 and rounded
+    'category_totals',      # (use_cases, categories) weighted totals per category
+    'category_max',         # (categories,), or (use_cases, categories) with a mask
+    'category_normalized',  # (use_cases, categories) category totals scaled to 0-100
+])
+
+def build_category_matrix(dimension_categories, categories=None):
+    """
+    Build a dimension x category membership matrix
+    
+    Args:
+        dimension_categories: Category name of each dimension, in column order
+        categories: Optional category order (defaults to first-seen order)
+    
+    Returns:
+        tuple: (categories list, membership matrix of 0/1 ints with shape
+            (dimensions, categories))
+    """
+    if categories is None:
+        categories = list(dict.fromkeys(dimension_categories))
+    column = {category: j for j, category in enumerate(categories)}
+    
+    membership = np.zeros((len(dimension_categories), len(categories)), dtype=np.int64)
+    for i, category in enumerate(dimension_categories):
+        membership[i, column[category]] = 1
+    
+    return list(categories), membership
+
+def normalize_totals(totals, max_totals):
+    """Scale totals to 0-100, rounding half to even like round(); 0 where max is 0"""
+    totals = np.asarray(totals, dtype=np.float64)
+    max_totals = np.broadcast_to(np.asarray(max_totals, dtype=np.float64), totals.shape)
+    ratio = np.divide(totals, max_totals, out=np.zeros_like(totals), where=max_totals > 0)
+    return np.rint(ratio * 100).astype(np.int64)
+
+def score_portfolio(score_matrix, weights, category_matrix=None, mask=None):
+    """
+    Score many use cases at once
+    
+    Args:
+        score_matrix: (use_cases, dimensions) array of dimension scores
+        weights: (dimensions,) weight vector
+        category_matrix: Optional (dimensions, categories) membership matrix
+            from build_category_matrix
+        mask: Optional (use_cases, dimensions) boolean array marking the
+            dimensions each use case was scored on; unscored dimensions count
+            towards neither the total nor the maximum
+    
+    Returns:
+        PortfolioScores: Totals, normalized scores and category breakdowns;
+            the category fields are None when no category matrix is given
+    """
+    scores = np.atleast_2d(np.asarray(score_matrix))
+    weights = np.asarray(weights)
+    
+    if mask is None:
+        totals = scores @ weights
+        max_totals = np.full(totals.shape, MAX_DIMENSION_SCORE * weights.sum())
+    else:
+        mask = np.atleast_2d(np.asarray(mask, dtype=bool))
+        scores = np.where(mask, scores, 0)
+        totals = scores @ weights
+        max_totals = MAX_DIMENSION_SCORE * (mask @ weights)
+    normalized = normalize_totals(totals, max_totals)
+    
+    if category_matrix is None:
+        return PortfolioScores(totals, max_totals, normalized, None, None, None)
+    
+    category_matrix = np.asarray(category_matrix)
+    category_totals = scores @ (category_matrix * weights[:, np.newaxis])
+    if mask is None:
+        category_max = MAX_DIMENSION_SCORE * (weights @ category_matrix)
+    else:
+        category_max = MAX_DIMENSION_SCORE * (mask @ (category_matrix * weights[:, np.newaxis]))
+    category_normalized = normalize_totals(category_totals, category_max)
+    
+    return PortfolioScores(totals, max_totals, normalized,
+                           category_totals, category_max, category_normalized)
+
 def calculate_scores(scores):
     """
     Calculate total and normalized scores
@@ -12,11 +102,15 @@ def calculate_scores(scores):
     Returns:
         tuple: (total_score, normalized_score)
     """
-    total_score = sum(s['score'] * s['weight'] for s in scores)
-    max_possible_score = sum(5 * s['weight'] for s in scores)
-    normalized_score = round((total_score / max_possible_score) * 100) if max_possible_score > 0 else 0
+    if not scores:
+        return 0, 0
     
-    return total_score, normalized_score
+    result = score_portfolio(
+        [[s['score'] for s in scores]],
+        [s['weight'] for s in scores]
+    )
+    
+    return result.totals[0].item(), result.normalized[0].item()
 
 def calculate_category_scores(scores):
     """
@@ -28,26 +122,24 @@ def calculate_category_scores(scores):
     Returns:
         dict: Category scores with total, max, and normalized values
     """
-    category_scores = {}
-    
-    for score in scores:
-        category = score['category']
-        if category not in category_scores:
-            category_scores[category] = {'total': 0, 'max': 0, 'normalized': 0}
-        
-        weighted_score = score['score'] * score['weight']
-        max_score = 5 * score['weight']
-        
-        category_scores[category]['total'] += weighted_score
-        category_scores[category]['max'] += max_score
-    
-    # Calculate normalized scores
-    for category in category_scores:
-        total = category_scores[category]['total']
-        max_val = category_scores[category]['max']
-        category_scores[category]['normalized'] = round((total / max_val) * 100) if max_val > 0 else 0
-    
-    return category_scores
+    if not scores:
+        return {}
+    
+    categories, membership = build_category_matrix([s['category'] for s in scores])
+    result = score_portfolio(
+        [[s['score'] for s in scores]],
+        [s['weight'] for s in scores],
+        membership
+    )
+    
+    return {
+        category: {
+            'total': result.category_totals[0, j].item(),
+            'max': result.category_max[j].item(),
+            'normalized': result.category_normalized[0, j].item()
+        }
+        for j, category in enumerate(categories)
+    }
 
 def get_score_interpretation(score):
     """
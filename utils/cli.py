@@ -0,0 +1,398 @@
+"""
+Command-line interface - Headless bulk scoring and import for the assessment pipeline
+
+Usage:
+    python -m utils.cli score scores.csv
+    python -m utils.cli score scores.jsonl --create-missing --insights
+    python -m utils.cli import use_cases.csv
+    python -m utils.cli export portfolio.parquet
+    python -m utils.cli report report.pdf UC-001 UC-002
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from utils.calculations import MAX_DIMENSION_SCORE, build_category_matrix, score_portfolio
+from utils.database import Database, INSIGHTS_PENDING
+from utils.exports import EXPORT_BATCH_SIZE, EXPORT_FORMATS, write_portfolio_export
+from utils.framework_loader import load_framework
+from utils.importer import (DEFAULT_CHUNK_SIZE, ValidationError, detect_format, import_use_cases,
+                            iter_rows)
+from utils.ranking import rank_use_cases
+from utils.reports import REPORT_FORMATS, generate_report
+
+# Records scored and written per transaction
+DEFAULT_BATCH_SIZE = 1000
+
+# Columns/keys describing the use case rather than a dimension score
+USE_CASE_FIELDS = ('use_case_id', 'name', 'description', 'business_unit', 'process_owner')
+
+def read_records(path, file_format=None):
+    """
+    Stream scoring records from a CSV or JSON Lines file
+    
+    CSV files have one row per use case: the USE_CASE_FIELDS columns
+    (only use_case_id is required) plus one column per dimension name.
+    JSON Lines files have one object per line with the same use case keys
+    and a 'scores' object mapping dimension names to a score, or to
+    {"score": 3, "low": 2, "high": 4} for a plausible range.
+    
+    Args:
+        path: Input file path
+        file_format: 'csv' or 'jsonl' (defaults to the file extension)
+    
+    Yields:
+        tuple: (line_number, record) where record has the use case fields
+            and a 'scores' dictionary; malformed lines yield a
+            ValidationError instead of a record
+    """
+    file_format = file_format or detect_format(path)
+    for line_number, row in iter_rows(path, file_format):
+        if file_format == 'csv' and isinstance(row, dict):
+            record = {key: row.pop(key) for key in USE_CASE_FIELDS if key in row}
+            record['scores'] = row
+            row = record
+        yield line_number, row
+
+def _whole_number(value):
+    """Convert a CSV/JSON value to int, rejecting fractions and booleans"""
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(value)
+    return int(value)
+
+def _parse_score(value, dimension):
+    """Parse one score (or range) into (score, low, high)"""
+    low = high = None
+    if isinstance(value, dict):
+        low, high = value.get('low'), value.get('high')
+        value = value.get('score')
+    
+    try:
+        score = _whole_number(value)
+        if low is not None or high is not None:
+            low = score if low is None else _whole_number(low)
+            high = score if high is None else _whole_number(high)
+    except (TypeError, ValueError):
+        raise ValidationError(f"{dimension}: scores must be whole numbers, got {value!r}")
+    
+    if not 1 <= score <= MAX_DIMENSION_SCORE:
+        raise ValidationError(f"{dimension}: score {score} is outside 1-{MAX_DIMENSION_SCORE}")
+    if low is not None and not 1 <= low <= score <= high <= MAX_DIMENSION_SCORE:
+        raise ValidationError(f"{dimension}: range {low}-{high} must contain {score} within 1-{MAX_DIMENSION_SCORE}")
+    if low == high:
+        low = high = None
+    
+    return score, low, high
+
+def validate_record(record, framework):
+    """
+    Check a record against the framework
+    
+    Args:
+        record: Record from read_records
+        framework: Framework to validate against
+    
+    Returns:
+        tuple: (use case fields dict, list of (score, low, high) in framework order)
+    """
+    use_case = {key: str(record.get(key) or '').strip() for key in USE_CASE_FIELDS}
+    if not use_case['use_case_id']:
+        raise ValidationError("missing use_case_id")
+    
+    scores = record.get('scores')
+    if not isinstance(scores, dict):
+        raise ValidationError("missing scores")
+    
+    unknown = set(scores) - set(framework.positions)
+    if unknown:
+        raise ValidationError(f"unknown dimensions: {', '.join(sorted(unknown))}")
+    missing = [dim['dimension'] for dim in framework if dim['dimension'] not in scores]
+    if missing:
+        raise ValidationError(f"missing {len(missing)} dimensions, e.g. {missing[0]}")
+    
+    return use_case, [_parse_score(scores[dim['dimension']], dim['dimension']) for dim in framework]
+
+def score_records(rows, framework):
+    """
+    Score validated records in one vectorized pass
+    
+    Args:
+        rows: List of (use case id, [(score, low, high), ...]) in framework order
+        framework: Framework the scores follow
+    
+    Returns:
+        list: Records for Database.save_assessments_bulk
+    """
+    if not rows:
+        return []
+    
+    score_matrix = np.array([[score for score, _, _ in scores] for _, scores in rows], dtype=np.int64)
+    categories, category_matrix = build_category_matrix(
+        [dim['category'] for dim in framework], framework.categories
+    )
+    result = score_portfolio(score_matrix, framework.weights, category_matrix)
+    
+    records = []
+    for i, (use_case_id, scores) in enumerate(rows):
+        records.append({
+            'use_case_id': use_case_id,
+            'scores': [
+                {
+                    'dimension': dim['dimension'],
+                    'category': dim['category'],
+                    'score': score,
+                    'weight': dim['default_weight'],
+                    'score_low': low,
+                    'score_high': high
+                }
+                for dim, (score, low, high) in zip(framework, scores)
+            ],
+            'total_score': result.totals[i].item(),
+            'normalized_score': result.normalized[i].item(),
+            'category_scores': {
+                category: {
+                    'total': result.category_totals[i, j].item(),
+                    'max': result.category_max[j].item(),
+                    'normalized': result.category_normalized[i, j].item()
+                }
+                for j, category in enumerate(categories)
+            },
+            'insights_status': INSIGHTS_PENDING
+        })
+    
+    return records
+
+def _generate_insights(db, records, framework, requests_per_minute):
+    """Generate and store AI insights for freshly scored records"""
+    from utils.ai_insights import generate_insights_batch
+    
+    items = [
+        {
+            'use_case': db.get_use_case(record['use_case_id']),
+            'scores': record['scores'],
+            'normalized_score': record['normalized_score'],
+            'category_scores': record['category_scores']
+        }
+        for record in records
+    ]
+    for index, insights, recommendations in generate_insights_batch(
+            items, requests_per_minute=requests_per_minute, framework=framework):
+        db.update_insights(records[index]['use_case_id'], insights, recommendations)
+
+def run_score(args):
+    """Run the score command; returns the process exit code"""
+    framework = load_framework()
+    db = Database(args.db)
+    
+    stats = {'read': 0, 'scored': 0, 'rejected': 0, 'created': 0,
+             'validate': 0.0, 'score': 0.0, 'write': 0.0, 'insights': 0.0}
+    started = time.perf_counter()
+    
+    def flush(batch):
+        if not batch:
+            return
+        
+        t = time.perf_counter()
+        ids = db.get_use_case_ids(use_case['use_case_id'] for _, use_case, _ in batch)
+        missing = [use_case for _, use_case, _ in batch if use_case['use_case_id'] not in ids]
+        if missing and args.create_missing:
+            stats['created'] += len(missing)
+            if args.dry_run:
+                # Would be created; score them without touching the database
+                ids.update((use_case['use_case_id'], -line_number) for line_number, use_case, _ in batch
+                           if use_case['use_case_id'] not in ids)
+            else:
+                # One transaction for the whole batch's new use cases
+                db.upsert_use_cases([
+                    dict(use_case, name=use_case['name'] or use_case['use_case_id']) for use_case in missing
+                ])
+                ids.update(db.get_use_case_ids(use_case['use_case_id'] for use_case in missing))
+        
+        rows = []
+        for line_number, use_case, scores in batch:
+            use_case_id = ids.get(use_case['use_case_id'])
+            if use_case_id is None:
+                print(f"line {line_number}: unknown use case {use_case['use_case_id']} "
+                      f"(use --create-missing to add it)", file=sys.stderr)
+                stats['rejected'] += 1
+                continue
+            rows.append((use_case_id, scores))
+        stats['validate'] += time.perf_counter() - t
+        
+        t = time.perf_counter()
+        records = score_records(rows, framework)
+        stats['score'] += time.perf_counter() - t
+        
+        if not args.dry_run and records:
+            stats['write'] += db.save_assessments_bulk(records)['seconds']
+            if args.insights:
+                t = time.perf_counter()
+                _generate_insights(db, records, framework, args.requests_per_minute)
+                stats['insights'] += time.perf_counter() - t
+        stats['scored'] += len(records)
+    
+    batch = []
+    seen = {}
+    t = time.perf_counter()
+    for line_number, record in read_records(args.input, args.format):
+        stats['read'] += 1
+        try:
+            if isinstance(record, ValidationError):
+                raise record
+            use_case, scores = validate_record(record, framework)
+            first_line = seen.setdefault(use_case['use_case_id'], line_number)
+            if first_line != line_number:
+                raise ValidationError(f"duplicate use case {use_case['use_case_id']} (first on line {first_line})")
+        except ValidationError as e:
+            print(f"line {line_number}: {e}", file=sys.stderr)
+            stats['rejected'] += 1
+            continue
+        
+        batch.append((line_number, use_case, scores))
+        if len(batch) >= args.batch_size:
+            stats['validate'] += time.perf_counter() - t
+            flush(batch)
+            batch = []
+            t = time.perf_counter()
+    stats['validate'] += time.perf_counter() - t
+    flush(batch)
+    
+    elapsed = time.perf_counter() - started
+    rate = stats['scored'] / elapsed if elapsed > 0 else 0.0
+    action = "Validated and scored" if args.dry_run else "Scored"
+    print(f"{action} {stats['scored']:,} of {stats['read']:,} use cases in {elapsed:.2f}s ({rate:,.0f}/s)")
+    print(f"  read+validate {stats['validate']:.2f}s, score {stats['score']:.2f}s, "
+          f"write {stats['write']:.2f}s" + (f", insights {stats['insights']:.2f}s" if args.insights else ""))
+    if stats['created']:
+        print(f"  {'would create' if args.dry_run else 'created'} {stats['created']:,} new use cases")
+    if stats['rejected']:
+        print(f"  rejected {stats['rejected']:,} records (see messages above)")
+    
+    return 1 if stats['rejected'] else 0
+
+def run_import(args):
+    """Run the import command; returns the process exit code"""
+    db = Database(args.db)
+    report = import_use_cases(db, args.input, args.format, chunk_size=args.chunk_size)
+    
+    for line_number, message in report['rejections']:
+        print(f"line {line_number}: {message}", file=sys.stderr)
+    if report['rejected'] > len(report['rejections']):
+        print(f"... and {report['rejected'] - len(report['rejections']):,} more rejected rows", file=sys.stderr)
+    
+    print(f"Imported {report['rows'] - report['rejected']:,} of {report['rows']:,} rows in "
+          f"{report['seconds']:.2f}s ({report['rows_per_second']:,.0f}/s)")
+    print(f"  inserted {report['inserted']:,}, updated {report['updated']:,}, "
+          f"unchanged {report['unchanged']:,}, rejected {report['rejected']:,}")
+    
+    return 1 if report['rejected'] else 0
+
+def run_export(args):
+    """Run the export command; returns the process exit code"""
+    db = Database(args.db)
+    
+    if args.output == '-' and args.format is None:
+        raise SystemExit("--format is required when writing to stdout")
+    
+    try:
+        if args.output == '-':
+            report = write_portfolio_export(db, sys.stdout.buffer, args.format, compress=args.gzip,
+                                            batch_size=args.batch_size, assessed_only=args.assessed_only)
+        else:
+            report = write_portfolio_export(db, args.output, args.format, compress=args.gzip or None,
+                                            batch_size=args.batch_size, assessed_only=args.assessed_only)
+    except (ValueError, ImportError) as e:
+        raise SystemExit(str(e))
+    
+    print(f"Exported {report['use_cases']:,} use cases in {report['seconds']:.2f}s "
+          f"({report['rows_per_second']:,.0f}/s)", file=sys.stderr)
+    return 0
+
+def run_report(args):
+    """Run the report command; returns the process exit code"""
+    db = Database(args.db)
+    
+    if args.top:
+        use_case_ids = [uc['id'] for uc in rank_use_cases(db, k=args.top)]
+    elif args.use_case_ids:
+        ids = db.get_use_case_ids(args.use_case_ids)
+        unknown = [use_case_id for use_case_id in args.use_case_ids if use_case_id not in ids]
+        if unknown:
+            raise SystemExit(f"Unknown use cases: {', '.join(unknown)}")
+        use_case_ids = [ids[use_case_id] for use_case_id in args.use_case_ids]
+    else:
+        raise SystemExit("Give use case IDs or --top")
+    
+    file_format = args.format or ('xlsx' if args.output.lower().endswith('.xlsx') else 'pdf')
+    started = time.perf_counter()
+    try:
+        _, data = generate_report(db, use_case_ids, file_format)
+    except (ValueError, ImportError) as e:
+        raise SystemExit(str(e))
+    with open(args.output, 'wb') as f:
+        f.write(data)
+    
+    print(f"Wrote {args.output} ({len(data) / 1024:,.0f} KB) in {time.perf_counter() - started:.2f}s")
+    return 0
+
+def build_parser():
+    """Build the argument parser"""
+    parser = argparse.ArgumentParser(
+        prog='python -m utils.cli',
+        description='Agentic AI Prioritization Framework command-line tools'
+    )
+    parser.add_argument('--db', default='data/assessments.db', help='Database path (default: %(default)s)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    score = subparsers.add_parser('score', help='Score use cases in bulk from a CSV or JSON Lines file')
+    score.add_argument('input', help='CSV or JSON Lines file of dimension scores')
+    score.add_argument('--format', choices=['csv', 'jsonl'], help='Input format (default: from the file extension)')
+    score.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                       help='Use cases scored and written per transaction (default: %(default)s)')
+    score.add_argument('--create-missing', action='store_true',
+                       help='Create use cases that are not in the database yet')
+    score.add_argument('--dry-run', action='store_true', help='Validate and score without writing')
+    score.add_argument('--insights', action='store_true',
+                       help='Generate AI insights after scoring (otherwise they are left pending)')
+    score.add_argument('--requests-per-minute', type=int,
+                       help='OpenAI request budget when generating insights')
+    score.set_defaults(handler=run_score)
+    
+    import_ = subparsers.add_parser('import', help='Create or update use cases from a CSV or JSON Lines file')
+    import_.add_argument('input', help='CSV or JSON Lines file with use_case_id, name, description, '
+                                       'business_unit and process_owner')
+    import_.add_argument('--format', choices=['csv', 'jsonl'], help='Input format (default: from the file extension)')
+    import_.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                         help='Rows upserted per transaction (default: %(default)s)')
+    import_.set_defaults(handler=run_import)
+    
+    export = subparsers.add_parser('export', help='Export every use case, summary and score to a file')
+    export.add_argument('output', help='Output file (.csv, .jsonl or .parquet, optionally .gz), or - for stdout')
+    export.add_argument('--format', choices=EXPORT_FORMATS, help='Output format (default: from the file extension)')
+    export.add_argument('--gzip', action='store_true',
+                        help='Gzip CSV/JSON Lines output (default: when the file name ends in .gz)')
+    export.add_argument('--batch-size', type=int, default=EXPORT_BATCH_SIZE,
+                        help='Use cases read and written per batch (default: %(default)s)')
+    export.add_argument('--assessed-only', action='store_true',
+                        help='Leave out unassessed use cases (needed to re-score a JSON Lines export)')
+    export.set_defaults(handler=run_export)
+    
+    report = subparsers.add_parser('report', help='Render a printable Excel or PDF report of assessments')
+    report.add_argument('output', help='Output file (.pdf or .xlsx)')
+    report.add_argument('use_case_ids', nargs='*', help='Use case IDs to include, in order (e.g. UC-001)')
+    report.add_argument('--top', type=int, help='Report on the top N use cases by overall score instead')
+    report.add_argument('--format', choices=REPORT_FORMATS, help='Report format (default: from the file extension)')
+    report.set_defaults(handler=run_report)
+    
+    return parser
+
+def main(argv=None):
+    """Command-line entry point"""
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,200 +3,1134 @@ Database utility - SQLite database operations
 """
 
 import sqlite3
+import functools
 import json
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 
+from utils.migrations import apply_migrations, get_schema_version
+
+# Maximum number of ids bound into a single IN (...) clause
+SQL_PARAMETER_CHUNK = 500
+
+# Connection pool defaults
+DEFAULT_POOL_SIZE = 5
+DEFAULT_BUSY_TIMEOUT = 5.0
+DEFAULT_STATEMENT_CACHE_SIZE = 128
+
+# Maximum number of Database read results kept in memory
+DEFAULT_READ_CACHE_SIZE = 2048
+
+# Values of assessment_summaries.insights_status
+INSIGHTS_PENDING = 'pending'
+INSIGHTS_READY = 'ready'
+INSIGHTS_FAILED = 'failed'
+
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections shared by every thread of the process
+    
+    Connections are opened lazily up to ``size`` and handed back to the pool
+    after each operation instead of being closed, so Streamlit sessions reuse
+    them across reruns. Each connection runs in WAL mode with
+    ``synchronous=NORMAL`` so readers never block the writer.
+    """
+    
+    def __init__(self, db_path, size=DEFAULT_POOL_SIZE, timeout=DEFAULT_BUSY_TIMEOUT,
+                 cached_statements=DEFAULT_STATEMENT_CACHE_SIZE):
+        """
+        Args:
+            db_path: Path to the SQLite database file
+            size: Maximum number of open connections
+            timeout: Seconds to wait on a locked database or for a free connection
+            cached_statements: Prepared-statement cache size per connection
+        """
+        self.db_path = str(db_path)
+        self.size = size
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+    
+    def _connect(self):
+        """Open and configure a new connection"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            cached_statements=self.cached_statements,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA busy_timeout={int(self.timeout * 1000)}')
+        return conn
+    
+    def acquire(self):
+        """Take a connection from the pool, opening one if the pool is not full"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._lock:
+            can_open = self._opened < self.size
+            if can_open:
+                self._opened += 1
+        
+        if can_open:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+        
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"Timed out after {self.timeout}s waiting for a database connection"
+            ) from None
+    
+    def release(self, conn):
+        """Return a connection to the pool"""
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+    
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; commits on success and rolls back on error"""
+        conn = self.acquire()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self.release(conn)
+    
+    def close(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+
+class ReadCache:
+    """
+    In-process LRU cache of Database reads with write-through invalidation
+    
+    Results about one use case are stamped with that use case's generation and
+    portfolio-wide results (lists) with the portfolio generation. Writes bump
+    only the generations they affect, so unrelated cached entries stay valid.
+    Commits made by other processes (e.g. the CLI) are detected through
+    SQLite's data_version and invalidate everything.
+    
+    Cached values are shared between callers and must be treated as read-only.
+    """
+    
+    def __init__(self, db_path, max_entries=DEFAULT_READ_CACHE_SIZE):
+        """
+        Args:
+            db_path: Path to the SQLite database file being cached
+            max_entries: Maximum number of cached results (LRU eviction)
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._epoch = 0
+        self._portfolio_generation = 0
+        self._use_case_generations = {}
+        self._lock = threading.Lock()
+        
+        # Dedicated connection whose data_version changes on any other commit
+        self._watcher = sqlite3.connect(db_path, check_same_thread=False)
+        self._data_version = self._read_data_version()
+    
+    def _read_data_version(self):
+        return self._watcher.execute('PRAGMA data_version').fetchone()[0]
+    
+    def _stamp(self, use_case_id):
+        if use_case_id is None:
+            return (self._epoch, self._portfolio_generation)
+        return (self._epoch, self._use_case_generations.get(use_case_id, 0))
+    
+    @property
+    def version(self):
+        """Changes whenever any cached data may have changed"""
+        with self._lock:
+            self._check_external_writes()
+            return (self._epoch, self._portfolio_generation)
+    
+    def _check_external_writes(self):
+        data_version = self._read_data_version()
+        if data_version != self._data_version:
+            self._data_version = data_version
+            self._epoch += 1
+    
+    def check_external_writes(self):
+        """
+        Pick up other processes' commits before a write of our own
+        
+        invalidate() and acknowledge_write() take the data_version after our
+        commit as seen, so anything committed elsewhere since the last check
+        must be accounted for first.
+        """
+        with self._lock:
+            self._check_external_writes()
+    
+    def get_or_load(self, key, use_case_id, loader):
+        """
+        Return a cached result, calling loader() on a miss
+        
+        Args:
+            key: Hashable cache key
+            use_case_id: Use case the result depends on (None for portfolio-wide)
+            loader: Callable producing the result
+        """
+        with self._lock:
+            self._check_external_writes()
+            stamp = self._stamp(use_case_id)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        
+        value = loader()
+        
+        with self._lock:
+            # Don't store a result that a concurrent write has already made stale
+            if self._stamp(use_case_id) == stamp:
+                self._entries[key] = (stamp, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        
+        return value
+    
+    def invalidate(self, use_case_ids=None):
+        """
+        Invalidate results after a write
+        
+        Args:
+            use_case_ids: Use cases affected by the write (None for all)
+        """
+        with self._lock:
+            self._portfolio_generation += 1
+            if use_case_ids is None:
+                self._epoch += 1
+            else:
+                for use_case_id in use_case_ids:
+                    self._use_case_generations[use_case_id] = self._use_case_generations.get(use_case_id, 0) + 1
+            # Our own commit is already accounted for
+            self._data_version = self._read_data_version()
+    
+    def acknowledge_write(self):
+        """
+        Record a commit of our own that doesn't affect cached results
+        
+        Call check_external_writes() before the write, so other processes'
+        commits aren't absorbed along with ours.
+        """
+        with self._lock:
+            self._data_version = self._read_data_version()
+    
+    def stats(self):
+        """Get hit/miss counters and current size"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+def cached_read(scope):
+    """
+    Decorator routing a Database read through the shared ReadCache
+    
+    Args:
+        scope: 'use_case' for methods whose first argument is the use case id
+            they read, 'portfolio' for reads spanning many use cases
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            key = (method.__name__, args, tuple(sorted(kwargs.items())))
+            use_case_id = args[0] if scope == 'use_case' else None
+            return self.cache.get_or_load(key, use_case_id, lambda: method(self, *args, **kwargs))
+        return wrapper
+    return decorator
+
+# Process-wide pools, read caches and initialized schemas, keyed by resolved database path
+_pools = {}
+_read_caches = {}
+_initialized = set()
+_registry_lock = threading.Lock()
+
+def get_pool(db_path, **options):
+    """
+    Get the shared connection pool for a database file
+    
+    Args:
+        db_path: Path to the SQLite database file
+        **options: ConnectionPool options, only used when the pool is first created
+    
+    Returns:
+        ConnectionPool: Pool shared by every Database pointing at the same file
+    """
+    key = str(Path(db_path).resolve())
+    with _registry_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(key, **options)
+    return pool
+
 class Database:
-    def __init__(self, db_path='data/assessments.db'):
-        """Initialize database connection"""
+    def __init__(self, db_path='data/assessments.db', pool_size=DEFAULT_POOL_SIZE,
+                 timeout=DEFAULT_BUSY_TIMEOUT, cached_statements=DEFAULT_STATEMENT_CACHE_SIZE):
+        """
+        Initialize database access
+        
+        Instances are cheap: the connection pool and read cache are shared per
+        database file and the schema is only checked the first time a file is
+        opened in this process.
+        
+        Args:
+            db_path: Path to the SQLite database file
+            pool_size: Maximum number of pooled connections
+            timeout: Busy timeout in seconds
+            cached_statements: Prepared-statement cache size per connection
+        """
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        self.init_database()
+        self.pool = get_pool(
+            self.db_path,
+            size=pool_size,
+            timeout=timeout,
+            cached_statements=cached_statements
+        )
+        
+        with _registry_lock:
+            if self.pool.db_path not in _initialized:
+                self.init_database()
+                _initialized.add(self.pool.db_path)
+            if self.pool.db_path not in _read_caches:
+                _read_caches[self.pool.db_path] = ReadCache(self.pool.db_path)
+            self.cache = _read_caches[self.pool.db_path]
+        
+        self._search_index = None
     
-    def get_connection(self):
-        """Get database connection"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+    def connection(self):
+        """Borrow a pooled connection (use as a context manager)"""
+        return self.pool.connection()
     
     def init_database(self):
-        """Initialize database tables"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Use cases table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS use_cases (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                use_case_id TEXT NOT NULL UNIQUE,
-                name TEXT NOT NULL,
-                description TEXT,
-                business_unit TEXT,
-                process_owner TEXT,
-                status TEXT DEFAULT 'draft',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Assessment scores table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS assessment_scores (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                use_case_id INTEGER NOT NULL,
-                dimension TEXT NOT NULL,
-                category TEXT NOT NULL,
-                score INTEGER NOT NULL,
-                weight INTEGER NOT NULL,
-                weighted_score INTEGER NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (use_case_id) REFERENCES use_cases(id) ON DELETE CASCADE
-            )
-        ''')
-        
-        # Assessment summaries table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS assessment_summaries (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                use_case_id INTEGER NOT NULL UNIQUE,
-                total_score INTEGER NOT NULL,
-                normalized_score INTEGER NOT NULL,
-                category_scores TEXT NOT NULL,
-                ai_insights TEXT,
-                recommendations TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (use_case_id) REFERENCES use_cases(id) ON DELETE CASCADE
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        """Bring the schema up to date by applying pending migrations"""
+        with self.connection() as conn:
+            apply_migrations(conn)
+    
+    def get_schema_version(self):
+        """Get the highest applied migration version"""
+        with self.connection() as conn:
+            return get_schema_version(conn)
     
     def create_use_case(self, use_case_id, name, description='', business_unit='', process_owner=''):
         """Create a new use case"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO use_cases (use_case_id, name, description, business_unit, process_owner)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (use_case_id, name, description, business_unit, process_owner))
+        self.cache.check_external_writes()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                INSERT INTO use_cases (use_case_id, name, description, business_unit, process_owner)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (use_case_id, name, description, business_unit, process_owner))
+            
+            uc_id = cursor.lastrowid
         
-        uc_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        self.cache.invalidate([uc_id])
         return uc_id
     
+    def upsert_use_cases(self, use_cases):
+        """
+        Insert or update many use cases in one transaction, matched by use_case_id
+        
+        Empty optional fields leave an existing use case's value unchanged, and
+        rows that would not change anything are not rewritten.
+        
+        Args:
+            use_cases: List of dictionaries with 'use_case_id', 'name' and
+                optionally 'description', 'business_unit' and 'process_owner'
+        
+        Returns:
+            dict: Counts of 'inserted', 'updated' and 'unchanged' use cases
+        """
+        rows = [
+            (
+                uc['use_case_id'],
+                uc['name'],
+                uc.get('description') or '',
+                uc.get('business_unit') or '',
+                uc.get('process_owner') or ''
+            )
+            for uc in use_cases
+        ]
+        if not rows:
+            return {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        
+        optional = ('description', 'business_unit', 'process_owner')
+        new_values = {'name': 'excluded.name'}
+        new_values.update(
+            (column, f"COALESCE(NULLIF(excluded.{column}, ''), use_cases.{column})")
+            for column in optional
+        )
+        
+        existing = self.get_use_case_ids(row[0] for row in rows)
+        self.cache.check_external_writes()
+        with self.connection() as conn:
+            cursor = conn.executemany(f'''
+                INSERT INTO use_cases (use_case_id, name, description, business_unit, process_owner)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(use_case_id) DO UPDATE SET
+                    {', '.join(f'{column} = {value}' for column, value in new_values.items())},
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE {' OR '.join(f'use_cases.{column} IS NOT {value}' for column, value in new_values.items())}
+            ''', rows)
+            written = cursor.rowcount
+        
+        self.cache.invalidate()
+        
+        inserted = len({row[0] for row in rows} - set(existing))
+        updated = max(written - inserted, 0)
+        return {'inserted': inserted, 'updated': updated, 'unchanged': max(len(rows) - inserted - updated, 0)}
+    
+    @cached_read('portfolio')
     def get_all_use_cases(self):
         """Get all use cases"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            rows = conn.execute('SELECT * FROM use_cases ORDER BY created_at DESC').fetchall()
+        
+        return [dict(row) for row in rows]
+    
+    @cached_read('portfolio')
+    def get_use_case_count(self):
+        """Get the number of use cases"""
+        with self.connection() as conn:
+            return conn.execute('SELECT COUNT(*) FROM use_cases').fetchone()[0]
+    
+    @cached_read('portfolio')
+    def get_use_cases_page(self, after_created_at=None, after_id=None, limit=20):
+        """
+        Get one page of use cases, newest first, using keyset pagination
+        
+        Pages are located by seeking the (created_at, id) index to the last row of
+        the previous page, so every page costs the same regardless of depth.
         
-        cursor.execute('SELECT * FROM use_cases ORDER BY created_at DESC')
-        rows = cursor.fetchall()
-        conn.close()
+        Args:
+            after_created_at: created_at of the last row of the previous page
+                (None for the first page)
+            after_id: id of the last row of the previous page
+            limit: Page size
+        
+        Returns:
+            tuple: (rows, next_cursor) where rows are use case dictionaries with
+                'normalized_score' and 'insights_status' from their summary (None
+                if not assessed), and next_cursor is the (after_created_at,
+                after_id) pair for the next page, or None on the last page
+        """
+        query = '''
+            SELECT uc.*, s.normalized_score, s.insights_status
+            FROM use_cases uc
+            LEFT JOIN assessment_summaries s ON s.use_case_id = uc.id
+        '''
+        params = []
+        if after_created_at is not None:
+            query += ' WHERE (uc.created_at, uc.id) < (?, ?)'
+            params.extend([after_created_at, after_id])
+        query += ' ORDER BY uc.created_at DESC, uc.id DESC LIMIT ?'
+        params.append(limit + 1)
+        
+        with self.connection() as conn:
+            rows = [dict(row) for row in conn.execute(query, params).fetchall()]
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1]['created_at'], rows[-1]['id'])
+        
+        return rows, next_cursor
+    
+    @cached_read('portfolio')
+    def search_use_cases(self, query='', status=None, business_unit=None, min_score=None,
+                         max_score=None, limit=50):
+        """
+        Search and filter use cases
+        
+        Text search runs against the FTS5 index over use case id, name,
+        description, business unit and process owner (every word must match,
+        as a prefix). Filters are applied in the same SQL query.
+        
+        Args:
+            query: Free-text search ('' to filter only)
+            status: Only use cases with this status
+            business_unit: Only use cases in this business unit
+            min_score: Minimum normalized score (excludes unassessed use cases)
+            max_score: Maximum normalized score (excludes unassessed use cases)
+            limit: Maximum number of results
+        
+        Returns:
+            list: Use case dictionaries with 'normalized_score' and
+                'insights_status' from their summary, best text match first
+                (newest first without a query)
+        """
+        terms = re.findall(r'\w+', query or '')
+        
+        sql = '''
+            SELECT uc.*, s.normalized_score, s.insights_status
+            FROM use_cases uc
+            LEFT JOIN assessment_summaries s ON s.use_case_id = uc.id
+        '''
+        conditions = []
+        params = []
+        order_by = 'uc.created_at DESC, uc.id DESC'
+        
+        if terms and self._has_search_index():
+            sql += ' JOIN use_cases_fts f ON f.rowid = uc.id'
+            conditions.append('f.use_cases_fts MATCH ?')
+            params.append(' '.join(f'"{term}"*' for term in terms))
+            order_by = 'f.rank'
+        elif terms:
+            for term in terms:
+                conditions.append(
+                    "(uc.use_case_id LIKE ? ESCAPE '\\' OR uc.name LIKE ? ESCAPE '\\' "
+                    "OR uc.description LIKE ? ESCAPE '\\' OR uc.business_unit LIKE ? ESCAPE '\\' "
+                    "OR uc.process_owner LIKE ? ESCAPE '\\')"
+                )
+                # '_' is a word character but a LIKE wildcard
+                pattern = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+                params.extend([f'%{pattern}%'] * 5)
+        
+        if status:
+            conditions.append('uc.status = ?')
+            params.append(status)
+        if business_unit:
+            conditions.append('uc.business_unit = ?')
+            params.append(business_unit)
+        if min_score is not None:
+            conditions.append('s.normalized_score >= ?')
+            params.append(min_score)
+        if max_score is not None:
+            conditions.append('s.normalized_score <= ?')
+            params.append(max_score)
+        
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += f' ORDER BY {order_by} LIMIT ?'
+        params.append(limit)
+        
+        with self.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
         
         return [dict(row) for row in rows]
     
+    @cached_read('portfolio')
+    def get_business_units(self):
+        """Get the distinct, non-empty business units"""
+        with self.connection() as conn:
+            rows = conn.execute('''
+                SELECT DISTINCT business_unit FROM use_cases
+                WHERE business_unit IS NOT NULL AND business_unit != ''
+                ORDER BY business_unit
+            ''').fetchall()
+        
+        return [row[0] for row in rows]
+    
+    def _has_search_index(self):
+        """Check whether the FTS5 search index exists"""
+        if self._search_index is None:
+            with self.connection() as conn:
+                row = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'use_cases_fts'"
+                ).fetchone()
+            self._search_index = row is not None
+        return self._search_index
+    
+    @cached_read('use_case')
     def get_use_case(self, use_case_id):
         """Get a specific use case"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM use_cases WHERE id = ?', (use_case_id,))
-        row = cursor.fetchone()
-        conn.close()
+        with self.connection() as conn:
+            row = conn.execute('SELECT * FROM use_cases WHERE id = ?', (use_case_id,)).fetchone()
         
         return dict(row) if row else None
     
+    def get_use_case_ids(self, use_case_ids):
+        """
+        Look up the row ids of many use cases by their business identifier
+        
+        Args:
+            use_case_ids: Iterable of use case identifiers (e.g. 'UC-001')
+        
+        Returns:
+            dict: Row id keyed by use case identifier (unknown identifiers are omitted)
+        """
+        use_case_ids = list(dict.fromkeys(use_case_ids))
+        ids = {}
+        
+        with self.connection() as conn:
+            for start in range(0, len(use_case_ids), SQL_PARAMETER_CHUNK):
+                chunk = use_case_ids[start:start + SQL_PARAMETER_CHUNK]
+                placeholders = ', '.join('?' * len(chunk))
+                rows = conn.execute(
+                    f'SELECT use_case_id, id FROM use_cases WHERE use_case_id IN ({placeholders})',
+                    chunk
+                ).fetchall()
+                ids.update((row['use_case_id'], row['id']) for row in rows)
+        
+        return ids
+    
     def delete_use_case(self, use_case_id):
         """Delete a use case and all related data"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        self.cache.check_external_writes()
+        with self.connection() as conn:
+            # Foreign keys are not enforced, so remove child rows explicitly
+            for table in ('assessment_scores', 'category_scores', 'assessment_summaries'):
+                conn.execute(f'DELETE FROM {table} WHERE use_case_id = ?', (use_case_id,))
+            conn.execute('DELETE FROM use_cases WHERE id = ?', (use_case_id,))
         
-        cursor.execute('DELETE FROM use_cases WHERE id = ?', (use_case_id,))
-        conn.commit()
-        conn.close()
+        self.cache.invalidate([use_case_id])
     
-    def save_assessment(self, use_case_id, scores, total_score, normalized_score, 
-                       category_scores, ai_insights='', recommendations=None):
+    def save_assessment(self, use_case_id, scores, total_score, normalized_score,
+                       category_scores, ai_insights='', recommendations=None,
+                       insights_status=INSIGHTS_READY):
         """Save assessment results"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        self.save_assessments_bulk([{
+            'use_case_id': use_case_id,
+            'scores': scores,
+            'total_score': total_score,
+            'normalized_score': normalized_score,
+            'category_scores': category_scores,
+            'ai_insights': ai_insights,
+            'recommendations': recommendations,
+            'insights_status': insights_status
+        }])
+    
+    def save_assessments_bulk(self, records):
+        """
+        Save many assessment results in a single transaction
         
-        # Delete existing scores
-        cursor.execute('DELETE FROM assessment_scores WHERE use_case_id = ?', (use_case_id,))
+        Args:
+            records: Iterable of dictionaries with the save_assessment arguments
+                ('use_case_id', 'scores', 'total_score', 'normalized_score',
+                'category_scores' and optionally 'ai_insights', 'recommendations',
+                'insights_status'); score dictionaries may also carry
+                'score_low' and 'score_high' for a plausible score range.
+                When a use case appears more than once, the last record wins
         
-        # Insert new scores
-        for score in scores:
-            cursor.execute('''
-                INSERT INTO assessment_scores 
-                (use_case_id, dimension, category, score, weight, weighted_score)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
+        Returns:
+            dict: Timing stats with 'assessments', 'score_rows', 'seconds' and
+                'assessments_per_second'
+        """
+        started = time.perf_counter()
+        
+        # A use case repeated in one batch keeps only its last record
+        records = {record['use_case_id']: record for record in records}.values()
+        
+        use_case_rows = []
+        score_rows = []
+        category_rows = []
+        summary_rows = []
+        for record in records:
+            use_case_id = record['use_case_id']
+            recommendations = record.get('recommendations')
+            
+            use_case_rows.append((use_case_id,))
+            score_rows.extend(
+                (
+                    use_case_id,
+                    score['dimension'],
+                    score['category'],
+                    score['score'],
+                    score['weight'],
+                    score['score'] * score['weight'],
+                    score.get('score_low'),
+                    score.get('score_high')
+                )
+                for score in record['scores']
+            )
+            category_rows.extend(
+                (use_case_id, category, values['total'], values['max'], values['normalized'])
+                for category, values in record['category_scores'].items()
+            )
+            summary_rows.append((
                 use_case_id,
-                score['dimension'],
-                score['category'],
-                score['score'],
-                score['weight'],
-                score['score'] * score['weight']
+                record['total_score'],
+                record['normalized_score'],
+                json.dumps(record['category_scores']),
+                record.get('ai_insights', ''),
+                json.dumps(recommendations) if recommendations else '[]',
+                record.get('insights_status', INSIGHTS_READY)
             ))
         
-        # Save or update summary
-        category_scores_json = json.dumps(category_scores)
-        recommendations_json = json.dumps(recommendations) if recommendations else '[]'
+        self.cache.check_external_writes()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            # Delete existing scores
+            cursor.executemany('DELETE FROM assessment_scores WHERE use_case_id = ?', use_case_rows)
+            
+            # Insert new scores
+            cursor.executemany('''
+                INSERT INTO assessment_scores
+                (use_case_id, dimension, category, score, weight, weighted_score, score_low, score_high)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', score_rows)
+            
+            # Replace category scores
+            cursor.executemany('DELETE FROM category_scores WHERE use_case_id = ?', use_case_rows)
+            cursor.executemany('''
+                INSERT INTO category_scores (use_case_id, category, total, max, normalized)
+                VALUES (?, ?, ?, ?, ?)
+            ''', category_rows)
+            
+            # Save or update summaries
+            cursor.executemany('''
+                INSERT OR REPLACE INTO assessment_summaries
+                (use_case_id, total_score, normalized_score, category_scores, ai_insights,
+                 recommendations, insights_status)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', summary_rows)
+            
+            # Update use case status
+            cursor.executemany('''
+                UPDATE use_cases SET status = 'completed', updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', use_case_rows)
+        
+        self.cache.invalidate([row[0] for row in use_case_rows])
+        
+        seconds = time.perf_counter() - started
+        return {
+            'assessments': len(summary_rows),
+            'score_rows': len(score_rows),
+            'seconds': seconds,
+            'assessments_per_second': len(summary_rows) / seconds if seconds > 0 else 0.0
+        }
+    
+    def update_insights(self, use_case_id, ai_insights, recommendations, summary_id=None,
+                        insights_status=INSIGHTS_READY):
+        """
+        Fill in the AI insights of an existing summary
+        
+        Args:
+            use_case_id: Use case id
+            ai_insights: Insights text
+            recommendations: List of recommendations
+            summary_id: Only update if the summary row still has this id, so a
+                late result never overwrites a newer resubmission
+            insights_status: New insights status
         
-        cursor.execute('''
-            INSERT OR REPLACE INTO assessment_summaries
-            (use_case_id, total_score, normalized_score, category_scores, ai_insights, recommendations)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (use_case_id, total_score, normalized_score, category_scores_json, 
-              ai_insights, recommendations_json))
+        Returns:
+            bool: True if a summary row was updated
+        """
+        query = '''
+            UPDATE assessment_summaries
+            SET ai_insights = ?, recommendations = ?, insights_status = ?,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE use_case_id = ?
+        '''
+        params = [ai_insights, json.dumps(recommendations or []), insights_status, use_case_id]
+        if summary_id is not None:
+            query += ' AND id = ?'
+            params.append(summary_id)
         
-        # Update use case status
-        cursor.execute('''
-            UPDATE use_cases SET status = 'completed', updated_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        ''', (use_case_id,))
+        self.cache.check_external_writes()
+        with self.connection() as conn:
+            updated = conn.execute(query, params).rowcount > 0
         
-        conn.commit()
-        conn.close()
+        self.cache.invalidate([use_case_id])
+        return updated
     
+    @cached_read('use_case')
     def get_assessment_scores(self, use_case_id):
         """Get assessment scores for a use case"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            rows = conn.execute('''
+                SELECT * FROM assessment_scores WHERE use_case_id = ?
+            ''', (use_case_id,)).fetchall()
         
-        cursor.execute('''
-            SELECT * FROM assessment_scores WHERE use_case_id = ?
-        ''', (use_case_id,))
+        return [dict(row) for row in rows]
+    
+    def iter_assessment_scores(self, batch_size=10000):
+        """
+        Stream every stored dimension score in batches
         
-        rows = cursor.fetchall()
-        conn.close()
+        Args:
+            batch_size: Rows fetched from SQLite at a time
         
-        return [dict(row) for row in rows]
+        Yields:
+            list: Batch of (use_case_id, dimension, score, score_low, score_high)
+                tuples; the range columns are None for certain scores
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute('''
+                SELECT s.use_case_id, s.dimension, s.score, s.score_low, s.score_high
+                FROM assessment_scores s
+                JOIN use_cases uc ON uc.id = s.use_case_id
+            ''')
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
     
+    def iter_portfolio_export(self, batch_size=1000):
+        """
+        Stream every use case with its summary and dimension scores in batches
+        
+        One cursor walks the use cases and a second walks the scores in the
+        same use case order, so only the current batch is held in memory.
+        
+        Args:
+            batch_size: Use cases per batch
+        
+        Yields:
+            list: Batch of use case dictionaries in id order, each with a
+                'summary' key (decoded summary or None) and a 'scores' list of
+                dimension score dictionaries
+        """
+        with self.connection() as conn:
+            use_cases = conn.execute('''
+                SELECT uc.*,
+                       s.id AS summary_id,
+                       s.total_score AS summary_total_score,
+                       s.normalized_score AS summary_normalized_score,
+                       s.category_scores AS summary_category_scores,
+                       s.ai_insights AS summary_ai_insights,
+                       s.recommendations AS summary_recommendations,
+                       s.insights_status AS summary_insights_status,
+                       s.created_at AS summary_created_at,
+                       s.updated_at AS summary_updated_at
+                FROM use_cases uc
+                LEFT JOIN assessment_summaries s ON s.use_case_id = uc.id
+                ORDER BY uc.id
+            ''')
+            
+            scores = conn.cursor()
+            scores.row_factory = None
+            scores.execute('''
+                SELECT use_case_id, dimension, category, score, weight, weighted_score,
+                       score_low, score_high
+                FROM assessment_scores
+                ORDER BY use_case_id, id
+            ''')
+            score_keys = [column[0] for column in scores.description][1:]
+            score_rows = (row for rows in iter(lambda: scores.fetchmany(batch_size), []) for row in rows)
+            pending = next(score_rows, None)
+            
+            columns = [column[0] for column in use_cases.description]
+            summary_start = columns.index('summary_id')
+            use_case_keys = columns[:summary_start]
+            summary_keys = [key[len('summary_'):] for key in columns[summary_start:]]
+            
+            while True:
+                rows = use_cases.fetchmany(batch_size)
+                if not rows:
+                    break
+                
+                batch = []
+                for row in rows:
+                    use_case = dict(zip(use_case_keys, row))
+                    summary = dict(zip(summary_keys, row[summary_start:]))
+                    
+                    if summary['id'] is None:
+                        use_case['summary'] = None
+                    else:
+                        summary['use_case_id'] = use_case['id']
+                        use_case['summary'] = self._decode_summary(summary)
+                    
+                    # Scores left behind by deleted use cases sort before the next id and are skipped
+                    use_case['scores'] = []
+                    while pending is not None and pending[0] <= use_case['id']:
+                        if pending[0] == use_case['id']:
+                            use_case['scores'].append(dict(zip(score_keys, pending[1:])))
+                        pending = next(score_rows, None)
+                    batch.append(use_case)
+                
+                yield batch
+    
+    @cached_read('use_case')
     def get_assessment_summary(self, use_case_id):
         """Get assessment summary for a use case"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            row = conn.execute('''
+                SELECT * FROM assessment_summaries WHERE use_case_id = ?
+            ''', (use_case_id,)).fetchone()
         
-        cursor.execute('''
-            SELECT * FROM assessment_summaries WHERE use_case_id = ?
-        ''', (use_case_id,))
+        if not row:
+            return None
+        
+        return self._decode_summary(dict(row))
+    
+    def get_summaries(self, use_case_ids):
+        """
+        Get assessment summaries for many use cases in one query
         
-        row = cursor.fetchone()
-        conn.close()
+        Args:
+            use_case_ids: Iterable of use case ids
         
-        if not row:
+        Returns:
+            dict: Decoded summaries keyed by use case id (ids without a summary are omitted)
+        """
+        use_case_ids = list(dict.fromkeys(use_case_ids))
+        summaries = {}
+        if not use_case_ids:
+            return summaries
+        
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            
+            # Stay below SQLite's host parameter limit on very large portfolios
+            for start in range(0, len(use_case_ids), SQL_PARAMETER_CHUNK):
+                chunk = use_case_ids[start:start + SQL_PARAMETER_CHUNK]
+                placeholders = ', '.join('?' * len(chunk))
+                cursor.execute(f'''
+                    SELECT * FROM assessment_summaries WHERE use_case_id IN ({placeholders})
+                ''', chunk)
+                for row in cursor.fetchall():
+                    summaries[row['use_case_id']] = self._decode_summary(dict(row))
+        
+        return summaries
+    
+    @cached_read('portfolio')
+    def get_all_use_cases_with_summaries(self):
+        """
+        Get all use cases joined with their assessment summary
+        
+        Returns:
+            list: Use case dictionaries, each with a 'summary' key holding the
+                decoded summary (or None when the use case has not been assessed)
+        """
+        with self.connection() as conn:
+            rows = conn.execute('''
+                SELECT uc.*,
+                       s.id AS summary_id,
+                       s.total_score AS summary_total_score,
+                       s.normalized_score AS summary_normalized_score,
+                       s.category_scores AS summary_category_scores,
+                       s.ai_insights AS summary_ai_insights,
+                       s.recommendations AS summary_recommendations,
+                       s.insights_status AS summary_insights_status,
+                       s.created_at AS summary_created_at,
+                       s.updated_at AS summary_updated_at
+                FROM use_cases uc
+                LEFT JOIN assessment_summaries s ON s.use_case_id = uc.id
+                ORDER BY uc.created_at DESC
+            ''').fetchall()
+        
+        use_cases = []
+        for row in rows:
+            use_case = {}
+            summary = {}
+            for key in row.keys():
+                if key.startswith('summary_'):
+                    summary[key[len('summary_'):]] = row[key]
+                else:
+                    use_case[key] = row[key]
+            
+            if summary['id'] is None:
+                use_case['summary'] = None
+            else:
+                summary['use_case_id'] = use_case['id']
+                use_case['summary'] = self._decode_summary(summary)
+            use_cases.append(use_case)
+        
+        return use_cases
+    
+    @cached_read('portfolio')
+    def get_top_use_cases_by_category(self, category, limit=20):
+        """
+        Get the highest-scoring use cases for one category
+        
+        Args:
+            category: Category name
+            limit: Maximum number of use cases
+        
+        Returns:
+            list: Use case dictionaries with the category's 'category_total',
+                'category_max' and 'category_normalized' and the overall
+                'normalized_score', best first (ties broken by overall score)
+        """
+        with self.connection() as conn:
+            rows = conn.execute('''
+                SELECT uc.*,
+                       c.total AS category_total,
+                       c.max AS category_max,
+                       c.normalized AS category_normalized,
+                       s.normalized_score
+                FROM category_scores c
+                JOIN use_cases uc ON uc.id = c.use_case_id
+                LEFT JOIN assessment_summaries s ON s.use_case_id = uc.id
+                WHERE c.category = ?
+                ORDER BY c.normalized DESC, s.normalized_score DESC, uc.id
+                LIMIT ?
+            ''', (category, limit)).fetchall()
+        
+        return [dict(row) for row in rows]
+    
+    @cached_read('portfolio')
+    def get_portfolio_stats(self):
+        """
+        Get portfolio-wide counts and score statistics, aggregated in SQL
+        
+        Percentiles use the nearest-rank method; the median averages the two
+        middle scores when the count is even. Score statistics cover assessed
+        use cases only.
+        
+        Returns:
+            dict: 'total', 'completed', 'assessed', 'average_score',
+                'median_score', 'min_score', 'max_score', 'p25_score',
+                'p75_score', 'p90_score' (scores are None when nothing has been
+                assessed), plus 'by_status' and 'by_business_unit' mapping each
+                group to a dictionary with 'count', 'assessed' and 'average_score'
+        """
+        with self.connection() as conn:
+            row = conn.execute('''
+                WITH scored AS (
+                    SELECT s.normalized_score AS score,
+                           ROW_NUMBER() OVER (ORDER BY s.normalized_score) AS rn,
+                           COUNT(*) OVER () AS n
+                    FROM assessment_summaries s
+                    JOIN use_cases uc ON uc.id = s.use_case_id
+                )
+                SELECT (SELECT COUNT(*) FROM use_cases) AS total,
+                       (SELECT COUNT(*) FROM use_cases WHERE status = 'completed') AS completed,
+                       COUNT(*) AS assessed,
+                       AVG(score) AS average_score,
+                       AVG(CASE WHEN rn IN ((n + 1) / 2, (n + 2) / 2) THEN score END) AS median_score,
+                       MIN(score) AS min_score,
+                       MAX(score) AS max_score,
+                       MIN(CASE WHEN rn * 4 >= n THEN score END) AS p25_score,
+                       MIN(CASE WHEN rn * 4 >= n * 3 THEN score END) AS p75_score,
+                       MIN(CASE WHEN rn * 10 >= n * 9 THEN score END) AS p90_score
+                FROM scored
+            ''').fetchone()
+            
+            groups = conn.execute('''
+                SELECT 'status' AS dimension, uc.status AS value, COUNT(*) AS count,
+                       COUNT(s.id) AS assessed, AVG(s.normalized_score) AS average_score
+                FROM use_cases uc
+                LEFT JOIN assessment_summaries s ON s.use_case_id = uc.id
+                GROUP BY uc.status
+                UNION ALL
+                SELECT 'business_unit', COALESCE(NULLIF(uc.business_unit, ''), 'Unassigned'),
+                       COUNT(*), COUNT(s.id), AVG(s.normalized_score)
+                FROM use_cases uc
+                LEFT JOIN assessment_summaries s ON s.use_case_id = uc.id
+                GROUP BY 2
+                ORDER BY 1, 3 DESC
+            ''').fetchall()
+        
+        stats = dict(row)
+        stats['by_status'] = {}
+        stats['by_business_unit'] = {}
+        for group in groups:
+            stats[f"by_{group['dimension']}"][group['value']] = {
+                'count': group['count'],
+                'assessed': group['assessed'],
+                'average_score': group['average_score']
+            }
+        
+        return stats
+    
+    def get_cached_insight(self, cache_key, max_age=None):
+        """
+        Look up a cached AI insight and mark it as recently used
+        
+        Args:
+            cache_key: Hash of the prompt inputs
+            max_age: Seconds after which an entry is treated as expired
+        
+        Returns:
+            tuple: (insights, recommendations), or None on a miss
+        """
+        now = time.time()
+        self.cache.check_external_writes()
+        with self.connection() as conn:
+            row = conn.execute('''
+                SELECT insights, recommendations, created_at FROM insight_cache WHERE cache_key = ?
+            ''', (cache_key,)).fetchone()
+            
+            if row is None:
+                return None
+            
+            expired = max_age is not None and now - row['created_at'] > max_age
+            if expired:
+                conn.execute('DELETE FROM insight_cache WHERE cache_key = ?', (cache_key,))
+            else:
+                conn.execute('''
+                    UPDATE insight_cache SET last_used_at = ?, hits = hits + 1 WHERE cache_key = ?
+                ''', (now, cache_key))
+        
+        self.cache.acknowledge_write()
+        if expired:
             return None
+        return row['insights'], json.loads(row['recommendations'])
+    
+    def put_cached_insight(self, cache_key, insights, recommendations, max_entries=None):
+        """
+        Store an AI insight in the cache
         
-        summary = dict(row)
+        Args:
+            cache_key: Hash of the prompt inputs
+            insights: Insights text
+            recommendations: List of recommendations
+            max_entries: Evict least recently used entries beyond this size
+        """
+        now = time.time()
+        self.cache.check_external_writes()
+        with self.connection() as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO insight_cache
+                (cache_key, insights, recommendations, created_at, last_used_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (cache_key, insights, json.dumps(recommendations or []), now, now))
+            
+            if max_entries is not None:
+                conn.execute('''
+                    DELETE FROM insight_cache WHERE cache_key IN (
+                        SELECT cache_key FROM insight_cache
+                        ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                    )
+                ''', (max_entries,))
+        
+        self.cache.acknowledge_write()
+    
+    def clear_insight_cache(self):
+        """Remove every cached AI insight"""
+        self.cache.check_external_writes()
+        with self.connection() as conn:
+            conn.execute('DELETE FROM insight_cache')
+        
+        self.cache.acknowledge_write()
+    
+    @staticmethod
+    def _decode_summary(summary):
+        """Decode the JSON and timestamp columns of a summary row"""
         summary['category_scores'] = json.loads(summary['category_scores'])
         summary['recommendations'] = json.loads(summary['recommendations']) if summary['recommendations'] else []
         summary['created_at'] = datetime.fromisoformat(summary['created_at'])
-        
         return summary
-
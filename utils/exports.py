@@ -0,0 +1,283 @@
+"""
+Exports - In-memory assessment downloads and streaming portfolio exports
+"""
+
+import csv
+import gzip
+import io
+import json
+import time
+from pathlib import Path
+
+from utils.framework_loader import load_framework
+
+# gzip level for compressed downloads; higher levels are much slower for little gain
+GZIP_LEVEL = 6
+
+# Portfolio export formats; parquet needs pyarrow
+EXPORT_FORMATS = ('csv', 'jsonl', 'parquet')
+
+# MIME types of the uncompressed portfolio export formats
+EXPORT_MIME_TYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+# Use cases read from SQLite and written per batch; memory grows with the batch size
+EXPORT_BATCH_SIZE = 500
+
+# Rows buffered per Parquet row group (flat rows are much smaller than exported use cases)
+PARQUET_ROW_GROUP_SIZE = 10000
+
+# Use case and summary columns of the flat (CSV/Parquet) export, before the
+# per-category and per-dimension score columns
+USE_CASE_COLUMNS = ('use_case_id', 'name', 'description', 'business_unit', 'process_owner',
+                    'status', 'created_at', 'updated_at')
+SUMMARY_COLUMNS = ('total_score', 'normalized_score', 'insights_status', 'ai_insights',
+                   'recommendations', 'assessed_at')
+
+def to_csv_bytes(df):
+    """Encode a DataFrame as UTF-8 CSV without touching the disk"""
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False)
+    return buffer.getvalue().encode('utf-8')
+
+def to_json_bytes(data):
+    """Encode data as indented UTF-8 JSON (dates and other values as strings)"""
+    return json.dumps(data, indent=2, default=str).encode('utf-8')
+
+def gzip_bytes(data, level=GZIP_LEVEL):
+    """Compress bytes with gzip"""
+    return gzip.compress(data, compresslevel=level)
+
+def export_file(file_name, data, mime, compress=False):
+    """
+    Package export bytes for st.download_button
+    
+    Args:
+        file_name: Download file name
+        data: Encoded file contents
+        mime: MIME type of the uncompressed file
+        compress: Gzip the contents and add a .gz extension
+    
+    Returns:
+        dict: 'file_name', 'data' and 'mime' keyword arguments
+    """
+    if compress:
+        return {'file_name': f"{file_name}.gz", 'data': gzip_bytes(data), 'mime': 'application/gzip'}
+    return {'file_name': file_name, 'data': data, 'mime': mime}
+
+def build_assessment_exports(use_case, summary, scores, scores_df, compress=False):
+    """
+    Build the CSV and JSON downloads for one assessment
+    
+    Args:
+        use_case: Use case dictionary
+        summary: Decoded assessment summary
+        scores: Dimension score dictionaries
+        scores_df: DataFrame of dimension scores for the CSV
+        compress: Gzip both files
+    
+    Returns:
+        dict: 'csv' and 'json' entries from export_file
+    """
+    base_name = f"assessment_{use_case['use_case_id']}"
+    export_data = {
+        'use_case': use_case,
+        'summary': summary,
+        'scores': scores
+    }
+    
+    return {
+        'csv': export_file(f"{base_name}.csv", to_csv_bytes(scores_df), 'text/csv', compress),
+        'json': export_file(f"{base_name}.json", to_json_bytes(export_data), 'application/json', compress),
+    }
+
+def detect_export_format(path):
+    """Guess the export format from an output path (a trailing .gz is ignored)"""
+    path = Path(str(path))
+    suffix = Path(path.stem).suffix if path.suffix.lower() == '.gz' else path.suffix
+    return 'csv' if suffix.lower() == '.csv' else 'parquet' if suffix.lower() == '.parquet' else 'jsonl'
+
+def portfolio_columns(framework):
+    """Column names of the flat portfolio export, in order"""
+    return (list(USE_CASE_COLUMNS) + list(SUMMARY_COLUMNS)
+            + [f"{category} score" for category in framework.categories]
+            + [dim['dimension'] for dim in framework])
+
+def flatten_use_case(use_case, framework):
+    """
+    Flatten an exported use case into one row of portfolio_columns
+    
+    Category columns hold normalized category scores and dimension columns
+    the recorded 1-5 scores; both are None for unassessed use cases.
+    
+    Args:
+        use_case: Use case from Database.iter_portfolio_export
+        framework: Framework giving the category and dimension columns
+    
+    Returns:
+        list: Row values
+    """
+    summary = use_case['summary'] or {}
+    category_scores = summary.get('category_scores', {})
+    scores = {score['dimension']: score['score'] for score in use_case['scores']}
+    
+    row = [use_case[column] for column in USE_CASE_COLUMNS]
+    row += [
+        summary.get('total_score'),
+        summary.get('normalized_score'),
+        summary.get('insights_status'),
+        summary.get('ai_insights'),
+        json.dumps(summary['recommendations']) if summary.get('recommendations') else None,
+        summary['created_at'].isoformat(sep=' ') if summary else None
+    ]
+    row += [category_scores.get(category, {}).get('normalized') for category in framework.categories]
+    row += [scores.get(dimension) for dimension in framework.positions]
+    return row
+
+def use_case_to_json(use_case):
+    """
+    Shape an exported use case as one JSON Lines record
+    
+    The use case fields and 'scores' mapping follow the input format of
+    ``python -m utils.cli score``. Unassessed use cases get an empty
+    'scores' mapping, which the score command rejects, so only exports
+    written with assessed_only can be re-scored as is.
+    
+    Args:
+        use_case: Use case from Database.iter_portfolio_export
+    
+    Returns:
+        dict: Use case fields, 'summary' (or None) and 'scores' mapping
+            dimension names to a score or a {'score', 'low', 'high'} range
+    """
+    record = {key: value for key, value in use_case.items() if key not in ('id', 'summary', 'scores')}
+    summary = use_case['summary']
+    record['summary'] = None if summary is None else {
+        key: value for key, value in summary.items() if key not in ('id', 'use_case_id')
+    }
+    record['scores'] = {
+        score['dimension']: score['score'] if score['score_low'] is None else {
+            'score': score['score'], 'low': score['score_low'], 'high': score['score_high']
+        }
+        for score in use_case['scores']
+    }
+    return record
+
+def _parquet_schema(framework):
+    """Arrow schema for the flat portfolio export"""
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise ImportError("Parquet export requires pyarrow: pip install pyarrow") from e
+    
+    integer_columns = {'total_score', 'normalized_score'}
+    integer_columns.update(f"{category} score" for category in framework.categories)
+    integer_columns.update(dim['dimension'] for dim in framework)
+    return pa.schema([
+        (column, pa.int64() if column in integer_columns else pa.string())
+        for column in portfolio_columns(framework)
+    ])
+
+def write_portfolio_export(db, target, file_format=None, compress=None, framework=None,
+                           batch_size=EXPORT_BATCH_SIZE, progress=None, assessed_only=False):
+    """
+    Stream every use case, summary and dimension score to a file
+    
+    Rows go from a SQLite cursor to the writer one batch at a time, so
+    memory stays flat however large the portfolio is. CSV and Parquet get
+    one flat row per use case (see portfolio_columns); JSON Lines keeps
+    score ranges and the full summary (see use_case_to_json).
+    
+    Args:
+        db: Database instance
+        target: Output path, or an open binary file
+        file_format: One of EXPORT_FORMATS (defaults to detect_export_format)
+        compress: Gzip CSV/JSON Lines output (defaults to a .gz path);
+            Parquet is always compressed internally
+        framework: Framework for the flat columns (defaults to load_framework())
+        batch_size: Use cases read and written per batch
+        progress: Optional callback called with the running use case count after each batch
+        assessed_only: Leave out use cases without dimension scores
+    
+    Returns:
+        dict: 'use_cases', 'seconds' and 'rows_per_second'
+    """
+    framework = framework or load_framework()
+    is_path = not hasattr(target, 'write')
+    file_format = file_format or detect_export_format(target if is_path else getattr(target, 'name', ''))
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported format: {file_format}")
+    if compress is None:
+        compress = is_path and str(target).lower().endswith('.gz')
+    if compress and file_format == 'parquet':
+        raise ValueError("Parquet output is already compressed; drop the gzip option")
+    
+    # Fail before creating the file when pyarrow is missing
+    schema = _parquet_schema(framework) if file_format == 'parquet' else None
+    
+    started = time.perf_counter()
+    count = 0
+    source = db.iter_portfolio_export(batch_size)
+    batches = ([uc for uc in batch if uc['scores']] for batch in source) if assessed_only else source
+    raw = open(target, 'wb') if is_path else target
+    
+    try:
+        if file_format == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            
+            def write_row_group(rows):
+                columns = zip(*rows)
+                writer.write_table(pa.Table.from_arrays(
+                    [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                    schema=schema
+                ))
+            
+            with pq.ParquetWriter(raw, schema) as writer:
+                rows = []
+                for batch in batches:
+                    rows.extend(flatten_use_case(use_case, framework) for use_case in batch)
+                    if len(rows) >= PARQUET_ROW_GROUP_SIZE:
+                        write_row_group(rows)
+                        rows = []
+                    count += len(batch)
+                    if progress:
+                        progress(count)
+                if rows:
+                    write_row_group(rows)
+        else:
+            binary = gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=GZIP_LEVEL) if compress else raw
+            f = io.TextIOWrapper(binary, encoding='utf-8', newline='')
+            try:
+                if file_format == 'csv':
+                    writer = csv.writer(f)
+                    writer.writerow(portfolio_columns(framework))
+                for batch in batches:
+                    if file_format == 'csv':
+                        writer.writerows(flatten_use_case(use_case, framework) for use_case in batch)
+                    else:
+                        f.writelines(json.dumps(use_case_to_json(use_case), default=str) + '\n'
+                                     for use_case in batch)
+                    count += len(batch)
+                    if progress:
+                        progress(count)
+                f.flush()
+            finally:
+                # Don't let the wrapper close the caller's file
+                f.detach()
+                if compress:
+                    binary.close()
+    finally:
+        source.close()
+        if is_path:
+            raw.close()
+    
+    seconds = time.perf_counter() - started
+    return {
+        'use_cases': count,
+        'seconds': seconds,
+        'rows_per_second': count / seconds if seconds > 0 else 0.0
+    }
@@ -3,21 +3,126 @@ Framework data loader - Loads the 31-dimension evaluation framework
 """
 
 import json
+import threading
+from collections.abc import Sequence
 from pathlib import Path
+from types import MappingProxyType
 
-def load_framework_data():
-    """Load framework data from JSON file"""
-    framework_file = Path(__file__).parent.parent / 'data' / 'framework_data.json'
+FRAMEWORK_FILE = Path(__file__).parent.parent / 'data' / 'framework_data.json'
+
+class Framework(Sequence):
+    """
+    Immutable, pre-indexed evaluation framework
+    
+    Iterates like the list of dimension dictionaries in framework_data.json
+    (each dimension is a read-only mapping), and additionally exposes lookups
+    that are built once when the file is parsed.
+    
+    Attributes:
+        dimensions: Tuple of dimension mappings in file order
+        categories: Tuple of category names in first-seen order
+        by_category: Mapping of category -> tuple of its dimensions
+        by_name: Mapping of dimension name -> dimension
+        positions: Mapping of dimension name -> index into dimensions
+        weights: Tuple of default weights aligned with dimensions
+    """
+    
+    def __init__(self, dimensions):
+        dimensions = tuple(_freeze_dimension(d) for d in dimensions)
+        
+        by_category = {}
+        for dim in dimensions:
+            by_category.setdefault(dim['category'], []).append(dim)
+        
+        object.__setattr__(self, 'dimensions', dimensions)
+        object.__setattr__(self, 'categories', tuple(by_category))
+        object.__setattr__(self, 'by_category', MappingProxyType(
+            {category: tuple(dims) for category, dims in by_category.items()}
+        ))
+        object.__setattr__(self, 'by_name', MappingProxyType(
+            {dim['dimension']: dim for dim in dimensions}
+        ))
+        object.__setattr__(self, 'positions', MappingProxyType(
+            {dim['dimension']: index for index, dim in enumerate(dimensions)}
+        ))
+        object.__setattr__(self, 'weights', tuple(dim['default_weight'] for dim in dimensions))
     
-    if not framework_file.exists():
-        # Return default framework if file doesn't exist
-        return get_default_framework()
+    def __setattr__(self, name, value):
+        raise AttributeError("Framework is immutable")
     
-    with open(framework_file, 'r') as f:
-        return json.load(f)
+    def __getitem__(self, index):
+        return self.dimensions[index]
+    
+    def __len__(self):
+        return len(self.dimensions)
+    
+    def sort_scores(self, scores):
+        """
+        Order score dictionaries by the framework's dimension order
+        
+        Args:
+            scores: Iterable of dictionaries with a 'dimension' key
+        
+        Returns:
+            list: Scores in framework order; unknown dimensions are kept last
+        """
+        last = len(self.dimensions)
+        return sorted(scores, key=lambda s: self.positions.get(s['dimension'], last))
+
+def _freeze_dimension(dimension):
+    """Return a read-only copy of a dimension dictionary"""
+    frozen = dict(dimension)
+    if 'scores' in frozen:
+        frozen['scores'] = MappingProxyType(dict(frozen['scores']))
+    return MappingProxyType(frozen)
+
+# Parsed frameworks keyed by file path, with the (mtime, size) they were parsed at
+_framework_cache = {}
+_framework_cache_lock = threading.Lock()
+
+def load_framework(framework_file=FRAMEWORK_FILE):
+    """
+    Load the framework, re-parsing the JSON file only when it changes
+    
+    Args:
+        framework_file: Path to the framework JSON file
+    
+    Returns:
+        Framework: Cached framework, invalidated by file mtime and size
+    """
+    framework_file = Path(framework_file)
+    cache_key = str(framework_file.resolve())
+    
+    try:
+        stat = framework_file.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        # Fall back to the default framework if the file doesn't exist
+        signature = None
+    
+    cached = _framework_cache.get(cache_key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    
+    if signature is None:
+        framework = Framework(get_default_framework())
+    else:
+        with open(framework_file, 'r') as f:
+            framework = Framework(json.load(f))
+    
+    with _framework_cache_lock:
+        _framework_cache[cache_key] = (signature, framework)
+    return framework
+
+def load_framework_data():
+    """Load framework data from JSON file (cached, see load_framework)"""
+    return load_framework()
 
 def get_categories(framework):
     """Get unique categories from framework"""
+    if isinstance(framework, Framework):
+        return list(framework.categories)
+    
     categories = []
     seen = set()
     for item in framework:
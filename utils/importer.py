@@ -0,0 +1,158 @@
+"""
+Importer - Streaming CSV/JSON Lines import of use cases
+"""
+
+import csv
+import io
+import json
+import time
+from pathlib import Path
+
+# Rows upserted per transaction
+DEFAULT_CHUNK_SIZE = 500
+
+# Rejected rows kept for the report; later rejections are only counted
+MAX_REPORTED_REJECTIONS = 100
+
+# Longest accepted value for each use case field
+FIELD_LIMITS = {
+    'use_case_id': 64,
+    'name': 200,
+    'description': 5000,
+    'business_unit': 200,
+    'process_owner': 200,
+}
+
+class ValidationError(ValueError):
+    """Raised for an input row that cannot be imported"""
+
+def detect_format(source):
+    """Guess 'csv' or 'jsonl' from a path or uploaded file name"""
+    name = getattr(source, 'name', source)
+    return 'csv' if Path(str(name)).suffix.lower() == '.csv' else 'jsonl'
+
+def iter_rows(source, file_format=None):
+    """
+    Stream rows from a CSV or JSON Lines file without loading it into memory
+    
+    Args:
+        source: File path, or an open text or binary file (e.g. a Streamlit upload)
+        file_format: 'csv' or 'jsonl' (defaults to detect_format)
+    
+    Yields:
+        tuple: (line_number, row) where row is a dictionary, or a
+            ValidationError for a line that could not be parsed
+    """
+    file_format = file_format or detect_format(source)
+    if file_format not in ('csv', 'jsonl'):
+        raise ValueError(f"Unsupported format: {file_format}")
+    
+    # Spreadsheet programs often start CSV files with a byte order mark
+    encoding = 'utf-8-sig' if file_format == 'csv' else 'utf-8'
+    if hasattr(source, 'read'):
+        f = source if isinstance(source, io.TextIOBase) else io.TextIOWrapper(source, encoding=encoding, newline='')
+        close = False
+    else:
+        f = open(source, newline='', encoding=encoding)
+        close = True
+    
+    try:
+        if file_format == 'csv':
+            reader = csv.DictReader(f)
+            for row in reader:
+                row.pop(None, None)  # values beyond the header
+                yield reader.line_num, row
+        else:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_number, ValidationError(f"invalid JSON: {e.msg}")
+                    continue
+                if not isinstance(row, dict):
+                    yield line_number, ValidationError("expected a JSON object")
+                    continue
+                yield line_number, row
+    finally:
+        if close:
+            f.close()
+        elif f is not source:
+            # Don't let the wrapper close the caller's file
+            f.detach()
+
+def validate_use_case(row):
+    """
+    Check and clean one use case row
+    
+    Args:
+        row: Dictionary from iter_rows
+    
+    Returns:
+        dict: Use case fields, stripped ('' for missing optional fields)
+    """
+    use_case = {field: str(row.get(field) or '').strip() for field in FIELD_LIMITS}
+    
+    for field in ('use_case_id', 'name'):
+        if not use_case[field]:
+            raise ValidationError(f"missing {field}")
+    for field, limit in FIELD_LIMITS.items():
+        if len(use_case[field]) > limit:
+            raise ValidationError(f"{field} is longer than {limit} characters")
+    
+    return use_case
+
+def import_use_cases(db, source, file_format=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                     max_reported=MAX_REPORTED_REJECTIONS, progress=None):
+    """
+    Import use cases from a file, upserting by use_case_id
+    
+    Rows are validated as they are read and written in chunks of
+    ``chunk_size`` rows, one transaction per chunk, so memory stays flat
+    regardless of file size.
+    
+    Args:
+        db: Database instance
+        source: File path or open file (see iter_rows)
+        file_format: 'csv' or 'jsonl' (defaults to detect_format)
+        chunk_size: Rows upserted per transaction
+        max_reported: Maximum number of rejected rows kept in the report
+        progress: Optional callback called with the running report after each chunk
+    
+    Returns:
+        dict: 'rows', 'inserted', 'updated', 'unchanged', 'rejected',
+            'rejections' (up to max_reported (line_number, message) tuples),
+            'seconds' and 'rows_per_second'
+    """
+    started = time.perf_counter()
+    report = {'rows': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'rejected': 0, 'rejections': []}
+    
+    def flush(chunk):
+        for key, count in db.upsert_use_cases(chunk).items():
+            report[key] += count
+        if progress:
+            progress(report)
+    
+    chunk = []
+    for line_number, row in iter_rows(source, file_format):
+        report['rows'] += 1
+        try:
+            if isinstance(row, ValidationError):
+                raise row
+            chunk.append(validate_use_case(row))
+        except ValidationError as e:
+            report['rejected'] += 1
+            if len(report['rejections']) < max_reported:
+                report['rejections'].append((line_number, str(e)))
+            continue
+        
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+    
+    report['seconds'] = time.perf_counter() - started
+    report['rows_per_second'] = report['rows'] / report['seconds'] if report['seconds'] > 0 else 0.0
+    return report
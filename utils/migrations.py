@@ -0,0 +1,236 @@
+"""
+Schema migrations - Versioned, ordered changes to the assessments database
+
+Each migration is a (version, description, step) tuple where step is either a
+list of SQL statements or a callable taking the connection. Pending migrations
+are applied in version order at startup, each in its own transaction, and
+recorded in the schema_version table. To change the schema, append a new
+migration with the next version number; never edit one that has shipped.
+"""
+
+import json
+import sqlite3
+
+def _create_initial_tables(conn):
+    """Create the original use case, score and summary tables"""
+    cursor = conn.cursor()
+    
+    # Use cases table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS use_cases (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            use_case_id TEXT NOT NULL UNIQUE,
+            name TEXT NOT NULL,
+            description TEXT,
+            business_unit TEXT,
+            process_owner TEXT,
+            status TEXT DEFAULT 'draft',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Assessment scores table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS assessment_scores (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            use_case_id INTEGER NOT NULL,
+            dimension TEXT NOT NULL,
+            category TEXT NOT NULL,
+            score INTEGER NOT NULL,
+            weight INTEGER NOT NULL,
+            weighted_score INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (use_case_id) REFERENCES use_cases(id) ON DELETE CASCADE
+        )
+    ''')
+    
+    # Assessment summaries table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS assessment_summaries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            use_case_id INTEGER NOT NULL UNIQUE,
+            total_score INTEGER NOT NULL,
+            normalized_score INTEGER NOT NULL,
+            category_scores TEXT NOT NULL,
+            ai_insights TEXT,
+            recommendations TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (use_case_id) REFERENCES use_cases(id) ON DELETE CASCADE
+        )
+    ''')
+
+def _create_use_case_search_index(conn):
+    """Create the FTS5 index over use cases, kept in sync by triggers"""
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_use_cases_business_unit ON use_cases(business_unit)')
+    
+    try:
+        conn.execute('''
+            CREATE VIRTUAL TABLE use_cases_fts USING fts5(
+                use_case_id, name, description, business_unit, process_owner,
+                content='use_cases', content_rowid='id'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        # SQLite builds without FTS5 fall back to LIKE scans in Database.search_use_cases
+        if 'fts5' not in str(e):
+            raise
+        return
+    
+    conn.execute('''
+        CREATE TRIGGER use_cases_fts_insert AFTER INSERT ON use_cases BEGIN
+            INSERT INTO use_cases_fts (rowid, use_case_id, name, description, business_unit, process_owner)
+            VALUES (new.id, new.use_case_id, new.name, new.description, new.business_unit, new.process_owner);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER use_cases_fts_delete AFTER DELETE ON use_cases BEGIN
+            INSERT INTO use_cases_fts (use_cases_fts, rowid, use_case_id, name, description, business_unit, process_owner)
+            VALUES ('delete', old.id, old.use_case_id, old.name, old.description, old.business_unit, old.process_owner);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER use_cases_fts_update
+        AFTER UPDATE OF use_case_id, name, description, business_unit, process_owner ON use_cases BEGIN
+            INSERT INTO use_cases_fts (use_cases_fts, rowid, use_case_id, name, description, business_unit, process_owner)
+            VALUES ('delete', old.id, old.use_case_id, old.name, old.description, old.business_unit, old.process_owner);
+            INSERT INTO use_cases_fts (rowid, use_case_id, name, description, business_unit, process_owner)
+            VALUES (new.id, new.use_case_id, new.name, new.description, new.business_unit, new.process_owner);
+        END
+    ''')
+    
+    # Index the rows that already exist
+    conn.execute("INSERT INTO use_cases_fts (use_cases_fts) VALUES ('rebuild')")
+
+def _create_category_scores_table(conn):
+    """Move category scores into their own table, backfilled from the summary JSON"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS category_scores (
+            use_case_id INTEGER NOT NULL,
+            category TEXT NOT NULL,
+            total INTEGER NOT NULL,
+            max INTEGER NOT NULL,
+            normalized INTEGER NOT NULL,
+            PRIMARY KEY (use_case_id, category),
+            FOREIGN KEY (use_case_id) REFERENCES use_cases(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    ''')
+    conn.execute(
+        'CREATE INDEX IF NOT EXISTS idx_category_scores_category_normalized '
+        'ON category_scores(category, normalized)'
+    )
+    
+    rows = conn.execute('''
+        SELECT s.use_case_id, s.category_scores
+        FROM assessment_summaries s
+        JOIN use_cases uc ON uc.id = s.use_case_id
+    ''').fetchall()
+    conn.executemany(
+        'INSERT OR REPLACE INTO category_scores (use_case_id, category, total, max, normalized) '
+        'VALUES (?, ?, ?, ?, ?)',
+        (
+            (use_case_id, category, values['total'], values['max'], values['normalized'])
+            for use_case_id, category_scores in rows
+            for category, values in json.loads(category_scores).items()
+        )
+    )
+
+MIGRATIONS = [
+    (1, 'Create use case, score and summary tables', _create_initial_tables),
+    (2, 'Add secondary indexes for score lookups and use case listing', [
+        'CREATE INDEX IF NOT EXISTS idx_assessment_scores_use_case ON assessment_scores(use_case_id)',
+        'CREATE INDEX IF NOT EXISTS idx_use_cases_created_at ON use_cases(created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_use_cases_status ON use_cases(status)',
+        'CREATE INDEX IF NOT EXISTS idx_assessment_summaries_normalized_score '
+        'ON assessment_summaries(normalized_score)',
+    ]),
+    (3, 'Track background AI insight generation on summaries', [
+        "ALTER TABLE assessment_summaries ADD COLUMN insights_status TEXT NOT NULL DEFAULT 'ready'",
+    ]),
+    (4, 'Add persistent AI insight cache', [
+        '''
+        CREATE TABLE IF NOT EXISTS insight_cache (
+            cache_key TEXT PRIMARY KEY,
+            insights TEXT NOT NULL,
+            recommendations TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used_at REAL NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_insight_cache_last_used_at ON insight_cache(last_used_at)',
+    ]),
+    (5, 'Add full-text search over use cases', _create_use_case_search_index),
+    (6, 'Store category scores in a queryable table', _create_category_scores_table),
+    (7, 'Record an optional plausible score range per dimension', [
+        'ALTER TABLE assessment_scores ADD COLUMN score_low INTEGER',
+        'ALTER TABLE assessment_scores ADD COLUMN score_high INTEGER',
+    ]),
+]
+
+def get_schema_version(conn):
+    """
+    Get the current schema version of a database
+    
+    Args:
+        conn: SQLite connection
+    
+    Returns:
+        int: Highest applied migration version (0 for a fresh database)
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    row = conn.execute('SELECT MAX(version) FROM schema_version').fetchone()
+    return row[0] or 0
+
+def apply_migrations(conn, migrations=MIGRATIONS):
+    """
+    Apply every pending migration in version order
+    
+    Args:
+        conn: SQLite connection
+        migrations: Ordered list of (version, description, step) tuples
+    
+    Returns:
+        list: Versions applied by this call
+    """
+    applied = []
+    current = get_schema_version(conn)
+    conn.commit()
+    
+    for version, description, step in sorted(migrations, key=lambda m: m[0]):
+        if version <= current:
+            continue
+        
+        # Take the write lock before re-checking so concurrent processes
+        # don't apply the same migration twice
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if get_schema_version(conn) >= version:
+                conn.rollback()
+                continue
+            
+            if callable(step):
+                step(conn)
+            else:
+                for statement in step:
+                    conn.execute(statement)
+            
+            conn.execute(
+                'INSERT INTO schema_version (version, description) VALUES (?, ?)',
+                (version, description)
+            )
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        
+        applied.append(version)
+    
+    return applied
@@ -0,0 +1,281 @@
+"""
+OpenAI client - Shared, pooled client with timeouts, retries and a circuit breaker
+"""
+
+import os
+import random
+import threading
+import time
+
+import httpx
+import openai
+from openai import OpenAI
+
+# Timeouts (seconds) for each API request
+OPENAI_CONNECT_TIMEOUT = float(os.getenv('OPENAI_CONNECT_TIMEOUT', '5'))
+OPENAI_READ_TIMEOUT = float(os.getenv('OPENAI_READ_TIMEOUT', '30'))
+
+# Retries for transient failures, with full-jitter exponential backoff
+OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', '2'))
+OPENAI_BACKOFF_BASE = float(os.getenv('OPENAI_BACKOFF_BASE', '0.5'))
+OPENAI_BACKOFF_MAX = float(os.getenv('OPENAI_BACKOFF_MAX', '8'))
+
+# Keep-alive connection pool shared by every request
+OPENAI_MAX_CONNECTIONS = int(os.getenv('OPENAI_MAX_CONNECTIONS', '10'))
+
+# Circuit breaker: after this many consecutive failures, skip the API for the reset period
+OPENAI_CIRCUIT_FAILURES = int(os.getenv('OPENAI_CIRCUIT_FAILURES', '5'))
+OPENAI_CIRCUIT_RESET = float(os.getenv('OPENAI_CIRCUIT_RESET', '60'))
+
+# Errors worth retrying; anything else (auth, bad request) fails immediately
+RETRYABLE_ERRORS = (
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the API while the circuit breaker is open"""
+
+class CircuitBreaker:
+    """
+    Stops calling a failing service until a cool-down period has passed
+    
+    The breaker opens after ``failure_threshold`` consecutive failures. Once
+    ``reset_timeout`` seconds have passed it lets a single trial call through;
+    success closes the breaker, failure re-opens it for another period.
+    """
+    
+    def __init__(self, failure_threshold=OPENAI_CIRCUIT_FAILURES, reset_timeout=OPENAI_CIRCUIT_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self):
+        """'closed', 'open' or 'half-open'"""
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+    
+    def allow(self):
+        """Check whether a call may be attempted now"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+    
+    def record_success(self):
+        """Close the breaker after a successful call"""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+    
+    def record_failure(self):
+        """Count a failed call, opening the breaker when the threshold is reached"""
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+    
+    def release(self):
+        """Give up a call without an outcome, letting another half-open trial through"""
+        with self._lock:
+            self._trial_in_flight = False
+
+breaker = CircuitBreaker()
+
+class RateLimiter:
+    """
+    Token-bucket limiter for requests per minute and tokens per minute
+    
+    Each bucket starts full and refills continuously; acquire() blocks until
+    both buckets can cover the request.
+    """
+    
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None):
+        """
+        Args:
+            requests_per_minute: Request budget (None for unlimited)
+            tokens_per_minute: Token budget (None for unlimited)
+        """
+        now = time.monotonic()
+        self._buckets = {}
+        for name, per_minute in (('requests', requests_per_minute), ('tokens', tokens_per_minute)):
+            if per_minute:
+                self._buckets[name] = {
+                    'capacity': float(per_minute),
+                    'level': float(per_minute),
+                    'rate': per_minute / 60.0,
+                    'updated': now
+                }
+        self._lock = threading.Lock()
+    
+    def acquire(self, tokens=0):
+        """Block until one request using ``tokens`` tokens fits in the budget"""
+        needs = {'requests': 1, 'tokens': tokens}
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                delay = 0.0
+                for name, bucket in self._buckets.items():
+                    bucket['level'] = min(
+                        bucket['capacity'],
+                        bucket['level'] + (now - bucket['updated']) * bucket['rate']
+                    )
+                    bucket['updated'] = now
+                    need = min(needs[name], bucket['capacity'])
+                    if bucket['level'] < need:
+                        delay = max(delay, (need - bucket['level']) / bucket['rate'])
+                
+                if delay == 0:
+                    for name, bucket in self._buckets.items():
+                        bucket['level'] -= min(needs[name], bucket['capacity'])
+                    return
+            
+            time.sleep(delay)
+
+_client = None
+_client_api_key = None
+_client_lock = threading.Lock()
+
+def get_client(api_key):
+    """
+    Get the process-wide OpenAI client, creating it on first use
+    
+    The client keeps its HTTP connection pool (and TLS sessions) alive between
+    calls. It is rebuilt only if the API key changes. Set OPENAI_BASE_URL to
+    point it at a proxy or a local stub server.
+    
+    Args:
+        api_key: OpenAI API key
+    
+    Returns:
+        OpenAI: Shared client with SDK-level retries disabled
+    """
+    global _client, _client_api_key
+    with _client_lock:
+        if _client is None or _client_api_key != api_key:
+            if _client is not None:
+                _client.close()
+            
+            timeout = httpx.Timeout(OPENAI_READ_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT)
+            _client = OpenAI(
+                api_key=api_key,
+                timeout=timeout,
+                max_retries=0,
+                http_client=httpx.Client(
+                    timeout=timeout,
+                    limits=httpx.Limits(
+                        max_connections=OPENAI_MAX_CONNECTIONS,
+                        max_keepalive_connections=OPENAI_MAX_CONNECTIONS
+                    )
+                )
+            )
+            _client_api_key = api_key
+        return _client
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff delay for a retry attempt (0-based)"""
+    return random.uniform(0, min(OPENAI_BACKOFF_MAX, OPENAI_BACKOFF_BASE * 2 ** attempt))
+
+def chat_completion(api_key, max_retries=OPENAI_MAX_RETRIES, **kwargs):
+    """
+    Create a chat completion through the shared client
+    
+    Transient errors are retried with jittered backoff. Calls fail fast with
+    CircuitOpenError while the breaker is open.
+    
+    Args:
+        api_key: OpenAI API key
+        max_retries: Retries after the first attempt
+        **kwargs: Arguments for client.chat.completions.create
+    
+    Returns:
+        The API response; with stream=True, an iterator over its chunks whose
+        outcome is reported to the breaker once it has been read
+    """
+    if not breaker.allow():
+        raise CircuitOpenError("OpenAI circuit breaker is open")
+    
+    client = get_client(api_key)
+    attempt = 0
+    while True:
+        try:
+            response = client.chat.completions.create(**kwargs)
+        except RETRYABLE_ERRORS:
+            if attempt >= max_retries:
+                breaker.record_failure()
+                raise
+            time.sleep(backoff_delay(attempt))
+            attempt += 1
+        except Exception:
+            breaker.record_failure()
+            raise
+        else:
+            if kwargs.get('stream'):
+                return _WatchedStream(response)
+            breaker.record_success()
+            return response
+
+class _WatchedStream:
+    """
+    Iterator over a streamed response's chunks that reports its outcome to the breaker
+    
+    Success is recorded once the stream is exhausted and failure if reading it
+    raises. A stream closed or dropped before then (e.g. a Streamlit rerun
+    during st.write_stream) only releases the breaker, so an abandoned
+    half-open trial can't block later calls.
+    """
+    
+    def __init__(self, stream):
+        self._finished = False
+        self._stream = stream
+        self._chunks = iter(stream)
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        if self._finished:
+            raise StopIteration
+        try:
+            return next(self._chunks)
+        except StopIteration:
+            self._finish(breaker.record_success)
+            raise
+        except Exception:
+            self._finish(breaker.record_failure)
+            raise
+        except BaseException:
+            self.close()
+            raise
+    
+    def _finish(self, report):
+        """Report the outcome once"""
+        if not self._finished:
+            self._finished = True
+            report()
+    
+    def close(self):
+        """Stop reading, releasing the breaker if the outcome is still unknown"""
+        if self._finished:
+            return
+        self._finish(breaker.release)
+        close = getattr(self._stream, 'close', None)
+        if close is not None:
+            close()
+    
+    def __del__(self):
+        self.close()
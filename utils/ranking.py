@@ -0,0 +1,230 @@
+"""
+Ranking engine - Prioritize the whole portfolio by overall or category score
+"""
+
+import threading
+
+import numpy as np
+
+from utils.calculations import build_category_matrix, score_portfolio
+from utils.framework_loader import load_framework
+
+# Rank by the overall normalized score rather than a category
+OVERALL = 'overall'
+
+class Portfolio:
+    """
+    Score matrix for every assessed use case, scored in one vectorized pass
+    
+    Attributes:
+        use_case_ids: (use_cases,) array of use case ids, ascending
+        categories: Category names, in framework order
+        score_matrix: (use_cases, dimensions) dimension scores (0 where unscored)
+        mask: (use_cases, dimensions) boolean array of scored dimensions
+        low_matrix: (use_cases, dimensions) lowest plausible scores
+        high_matrix: (use_cases, dimensions) highest plausible scores
+        weights: (dimensions,) framework weights
+        category_matrix: (dimensions, categories) membership matrix
+        scores: PortfolioScores for the whole portfolio
+    """
+    
+    def __init__(self, use_case_ids, score_matrix, mask, framework, low_matrix=None,
+                 high_matrix=None):
+        self.use_case_ids = np.asarray(use_case_ids, dtype=np.int64)
+        self.score_matrix = np.asarray(score_matrix, dtype=np.int64)
+        self.mask = np.asarray(mask, dtype=bool)
+        self.low_matrix = self.score_matrix if low_matrix is None else np.asarray(low_matrix, dtype=np.int64)
+        self.high_matrix = self.score_matrix if high_matrix is None else np.asarray(high_matrix, dtype=np.int64)
+        self.weights = np.asarray(framework.weights, dtype=np.int64)
+        self.categories, self.category_matrix = build_category_matrix(
+            [dim['category'] for dim in framework], framework.categories
+        )
+        self.scores = score_portfolio(self.score_matrix, self.weights, self.category_matrix, self.mask)
+    
+    def __len__(self):
+        return len(self.use_case_ids)
+    
+    def values(self, by=OVERALL):
+        """
+        Get the normalized score every use case is ranked on
+        
+        Args:
+            by: OVERALL or a category name
+        
+        Returns:
+            numpy.ndarray: (use_cases,) normalized scores
+        """
+        if by == OVERALL:
+            return self.scores.normalized
+        if by not in self.categories:
+            raise ValueError(f"Unknown ranking category: {by}")
+        return self.scores.category_normalized[:, self.categories.index(by)]
+    
+    def rank(self, by=OVERALL, k=None):
+        """
+        Rank the portfolio, best first
+        
+        Ties on the ranked score are broken by the overall normalized score,
+        then the weighted total, then the oldest use case (lowest id).
+        
+        Args:
+            by: OVERALL or a category name
+            k: Number of use cases to return (None for the whole portfolio)
+        
+        Returns:
+            list: Dictionaries with 'rank', 'id', 'score', 'normalized_score'
+                and 'total_score'
+        """
+        values = self.values(by)
+        order = top_k(values, k, tie_breakers=(self.scores.normalized, self.scores.totals),
+                      ids=self.use_case_ids)
+        
+        return [
+            {
+                'rank': position + 1,
+                'id': self.use_case_ids[i].item(),
+                'score': values[i].item(),
+                'normalized_score': self.scores.normalized[i].item(),
+                'total_score': self.scores.totals[i].item()
+            }
+            for position, i in enumerate(order)
+        ]
+
+def top_k(values, k=None, tie_breakers=(), ids=None):
+    """
+    Indices of the k highest values, best first
+    
+    Uses a partial sort (argpartition) to find the k-th best value, then fully
+    orders only the candidates at or above it, so the cost is O(n + c log c)
+    for c candidates rather than a sort of the whole array.
+    
+    Args:
+        values: (n,) array to rank, higher is better
+        k: Number of indices to return (None for all)
+        tie_breakers: Arrays compared in turn when values tie, higher is better
+        ids: Optional (n,) array compared last, lower is better (defaults to
+            the index itself)
+    
+    Returns:
+        numpy.ndarray: Indices into values
+    """
+    values = np.asarray(values)
+    n = len(values)
+    if k is None or k >= n:
+        candidates = np.arange(n)
+    elif k <= 0:
+        return np.array([], dtype=np.int64)
+    else:
+        # Keep every value tied with the k-th best so tie-breaking is exact
+        threshold = values[np.argpartition(-values, k - 1)[k - 1]]
+        candidates = np.flatnonzero(values >= threshold)
+    
+    ids = np.arange(n) if ids is None else np.asarray(ids)
+    # lexsort sorts by the last key first and ascending, so negate "higher is better" keys
+    keys = [ids[candidates]]
+    keys += [-np.asarray(tb)[candidates] for tb in reversed(tie_breakers)]
+    keys.append(-values[candidates])
+    order = candidates[np.lexsort(keys)]
+    
+    return order if k is None else order[:k]
+
+def build_portfolio(db, framework=None):
+    """
+    Build the scored portfolio from the stored dimension scores
+    
+    Use cases are re-scored against the current framework; dimensions that
+    are no longer in the framework are ignored.
+    
+    Args:
+        db: Database instance
+        framework: Framework (defaults to load_framework())
+    
+    Returns:
+        Portfolio: Every use case with at least one stored score
+    """
+    framework = framework or load_framework()
+    
+    row_ids, columns, scores, lows, highs = [], [], [], [], []
+    for batch in db.iter_assessment_scores():
+        batch_ids, dimensions, batch_scores, batch_lows, batch_highs = zip(*batch)
+        row_ids.append(np.array(batch_ids, dtype=np.int64))
+        columns.append(np.array([framework.positions.get(d, -1) for d in dimensions], dtype=np.int64))
+        scores.append(np.array(batch_scores, dtype=np.int64))
+        # Scores without a range are certain: low = high = score
+        lows.append(np.array([s if low is None else low for s, low in zip(batch_scores, batch_lows)],
+                             dtype=np.int64))
+        highs.append(np.array([s if high is None else high for s, high in zip(batch_scores, batch_highs)],
+                              dtype=np.int64))
+    
+    empty = np.array([], dtype=np.int64)
+    row_ids, columns, scores, lows, highs = (
+        np.concatenate(arrays) if arrays else empty
+        for arrays in (row_ids, columns, scores, lows, highs)
+    )
+    
+    # Drop dimensions that are no longer in the framework
+    known = columns >= 0
+    row_ids, columns, scores, lows, highs = (
+        array[known] for array in (row_ids, columns, scores, lows, highs)
+    )
+    
+    use_case_ids, rows_index = np.unique(row_ids, return_inverse=True)
+    shape = (len(use_case_ids), len(framework))
+    score_matrix = np.zeros(shape, dtype=np.int64)
+    low_matrix = np.zeros(shape, dtype=np.int64)
+    high_matrix = np.zeros(shape, dtype=np.int64)
+    mask = np.zeros(shape, dtype=bool)
+    score_matrix[rows_index, columns] = scores
+    low_matrix[rows_index, columns] = lows
+    high_matrix[rows_index, columns] = highs
+    mask[rows_index, columns] = True
+    
+    return Portfolio(use_case_ids, score_matrix, mask, framework, low_matrix, high_matrix)
+
+# Portfolios keyed by database path, with the cache version and framework they were built from
+_portfolios = {}
+_portfolios_lock = threading.Lock()
+
+def get_portfolio(db, framework=None):
+    """
+    Get the scored portfolio, rebuilding it only after the database changes
+    
+    Args:
+        db: Database instance
+        framework: Framework (defaults to load_framework())
+    
+    Returns:
+        Portfolio: Shared, read-only portfolio
+    """
+    framework = framework or load_framework()
+    version = db.cache.version
+    
+    cached = _portfolios.get(db.pool.db_path)
+    if cached is not None and cached[0] == version and cached[1] is framework:
+        return cached[2]
+    
+    portfolio = build_portfolio(db, framework)
+    with _portfolios_lock:
+        _portfolios[db.pool.db_path] = (version, framework, portfolio)
+    return portfolio
+
+def rank_use_cases(db, by=OVERALL, k=20, framework=None):
+    """
+    Get the top-k use cases of the portfolio with their details
+    
+    Args:
+        db: Database instance
+        by: OVERALL or a category name
+        k: Number of use cases (None for all)
+        framework: Framework (defaults to load_framework())
+    
+    Returns:
+        list: Use case dictionaries from Database.get_all_use_cases, each with
+            the ranking fields of Portfolio.rank
+    """
+    ranked = []
+    for entry in get_portfolio(db, framework).rank(by, k):
+        use_case = db.get_use_case(entry['id'])
+        if use_case is not None:
+            ranked.append({**use_case, **entry})
+    return ranked
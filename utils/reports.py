@@ -0,0 +1,562 @@
+"""
+Reports - Printable Excel/PDF assessment reports rendered in a background process pool
+"""
+
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+from utils.calculations import get_score_color, get_score_interpretation
+from utils.framework_loader import load_framework
+
+# Number of worker processes rendering reports
+REPORT_WORKERS = int(os.getenv('REPORT_WORKERS', '2'))
+
+# Rendered reports kept in memory; least recently used reports are evicted beyond this
+REPORT_CACHE_MAX_ENTRIES = int(os.getenv('REPORT_CACHE_MAX_ENTRIES', '50'))
+
+# Rendered category charts kept for reuse across reports
+REPORT_CHART_CACHE_MAX_ENTRIES = 500
+
+# Largest number of use cases in one report
+REPORT_MAX_USE_CASES = 200
+
+# Finished jobs remembered for status lookups
+REPORT_MAX_JOBS = 100
+
+REPORT_FORMATS = ('xlsx', 'pdf')
+REPORT_MIME_TYPES = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'pdf': 'application/pdf',
+}
+REPORT_TITLE = "Agentic AI Prioritization Report"
+
+# Strengths and challenges listed per use case, as on the Results page
+HIGHLIGHT_COUNT = 5
+
+_executor = None
+_jobs = OrderedDict()
+_reports = OrderedDict()
+_charts = OrderedDict()
+_lock = threading.Lock()
+
+def build_report_items(db, use_case_ids, framework=None):
+    """
+    Collect what a report shows for each assessed use case
+    
+    Items are plain, picklable dictionaries so they can be sent to the
+    worker processes.
+    
+    Args:
+        db: Database instance
+        use_case_ids: Use case ids in report order
+        framework: Framework for dimension order (defaults to load_framework())
+    
+    Returns:
+        list: Report items; use cases without an assessment are left out
+    """
+    framework = framework or load_framework()
+    use_case_ids = list(dict.fromkeys(use_case_ids))
+    if len(use_case_ids) > REPORT_MAX_USE_CASES:
+        raise ValueError(f"Reports are limited to {REPORT_MAX_USE_CASES} use cases")
+    
+    summaries = db.get_summaries(use_case_ids)
+    items = []
+    for use_case_id in use_case_ids:
+        summary = summaries.get(use_case_id)
+        if summary is None:
+            continue
+        
+        use_case = db.get_use_case(use_case_id)
+        scores = framework.sort_scores(db.get_assessment_scores(use_case_id))
+        category_scores = summary['category_scores']
+        items.append({
+            'use_case': {key: use_case.get(key) or '' for key in
+                         ('use_case_id', 'name', 'description', 'business_unit', 'process_owner')},
+            'normalized_score': summary['normalized_score'],
+            'total_score': summary['total_score'],
+            'interpretation': get_score_interpretation(summary['normalized_score']),
+            'color': get_score_color(summary['normalized_score']),
+            'assessed_on': summary['created_at'].strftime("%Y-%m-%d"),
+            'category_scores': category_scores,
+            'chart_key': hashlib.sha256(json.dumps(category_scores, sort_keys=True).encode()).hexdigest(),
+            'strengths': sorted((s for s in scores if s['score'] >= 4),
+                                key=lambda s: s['score'], reverse=True)[:HIGHLIGHT_COUNT],
+            'challenges': sorted((s for s in scores if s['score'] <= 2),
+                                 key=lambda s: s['score'])[:HIGHLIGHT_COUNT],
+            'scores': [
+                {key: score[key] for key in ('dimension', 'category', 'score', 'weight', 'weighted_score')}
+                for score in scores
+            ],
+            'ai_insights': summary.get('ai_insights') or '',
+            'recommendations': summary.get('recommendations') or []
+        })
+    
+    return items
+
+def report_file_name(items, file_format):
+    """Download name for a report"""
+    if len(items) == 1:
+        return f"report_{items[0]['use_case']['use_case_id']}.{file_format}"
+    return f"report_{len(items)}_use_cases_{datetime.now():%Y%m%d_%H%M%S}.{file_format}"
+
+def _render_chart(category_scores):
+    """Render the Results page category chart as PNG bytes, or None without kaleido"""
+    try:
+        import plotly.express as px
+        
+        fig = px.bar(
+            x=[data['normalized'] for data in category_scores.values()],
+            y=list(category_scores),
+            orientation='h',
+            color=[data['normalized'] for data in category_scores.values()],
+            color_continuous_scale='RdYlGn',
+            range_color=[0, 100],
+            labels={'x': 'Score (0-100)', 'y': 'Category', 'color': 'Score'},
+            title='Category Performance'
+        )
+        fig.update_layout(showlegend=False)
+        return fig.to_image(format='png', width=900, height=400)
+    except Exception as e:
+        # Static image export needs the optional kaleido package
+        print(f"Category chart not rendered: {e}")
+        return None
+
+def _paragraph_text(text):
+    """Escape free text for a reportlab Paragraph, keeping line breaks"""
+    return escape(str(text)).replace('\n', '<br/>')
+
+def _render_pdf(items, charts):
+    """Render items as a PDF document"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import cm
+    from reportlab.platypus import (Image, PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table,
+                                    TableStyle)
+    
+    styles = getSampleStyleSheet()
+    table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f77b4')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+        ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ])
+    
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, title=REPORT_TITLE,
+                            leftMargin=2 * cm, rightMargin=2 * cm, topMargin=2 * cm, bottomMargin=2 * cm)
+    story = [
+        Paragraph(REPORT_TITLE, styles['Title']),
+        Paragraph(f"Generated {datetime.now():%Y-%m-%d %H:%M}", styles['Normal']),
+        Spacer(1, 0.5 * cm)
+    ]
+    
+    if len(items) > 1:
+        rows = [['ID', 'Name', 'Business Unit', 'Score', 'Assessed On']]
+        rows += [
+            [item['use_case']['use_case_id'], Paragraph(escape(item['use_case']['name']), styles['BodyText']),
+             item['use_case']['business_unit'], item['normalized_score'], item['assessed_on']]
+            for item in items
+        ]
+        story += [Table(rows, colWidths=[2.5 * cm, 7 * cm, 3.5 * cm, 1.5 * cm, 2.5 * cm],
+                        style=table_style, repeatRows=1), PageBreak()]
+    
+    for index, item in enumerate(items):
+        if index:
+            story.append(PageBreak())
+        use_case = item['use_case']
+        story.append(Paragraph(escape(f"{use_case['use_case_id']} - {use_case['name']}"), styles['Heading1']))
+        if use_case['description']:
+            story.append(Paragraph(f"<i>{_paragraph_text(use_case['description'])}</i>", styles['BodyText']))
+        story.append(Paragraph(
+            f"Business Unit: {escape(use_case['business_unit'] or 'N/A')} &nbsp; · &nbsp; "
+            f"Process Owner: {escape(use_case['process_owner'] or 'N/A')} &nbsp; · &nbsp; "
+            f"Assessed On: {item['assessed_on']}",
+            styles['BodyText']
+        ))
+        story.append(Paragraph(
+            f"<font size=28 color='{item['color']}'><b>{item['normalized_score']}</b></font>"
+            f"<font size=12> / 100 &nbsp; {escape(item['interpretation'])}</font>",
+            styles['Normal']
+        ))
+        story.append(Spacer(1, 1.2 * cm))
+        
+        story.append(Paragraph("Category Breakdown", styles['Heading2']))
+        chart = charts.get(item['chart_key'])
+        if chart:
+            story.append(Image(io.BytesIO(chart), width=17 * cm, height=17 * cm * 400 / 900))
+        rows = [['Category', 'Total', 'Max', 'Score (0-100)']]
+        rows += [[category, data['total'], data['max'], data['normalized']]
+                 for category, data in item['category_scores'].items()]
+        story.append(Table(rows, colWidths=[8 * cm, 2.5 * cm, 2.5 * cm, 3 * cm], style=table_style))
+        
+        for title, highlights, empty in (
+                ("Top Strengths", item['strengths'], "No dimensions scored 4 or above."),
+                ("Key Challenges", item['challenges'], "No dimensions scored 2 or below.")):
+            story.append(Paragraph(title, styles['Heading2']))
+            if highlights:
+                rows = [['Dimension', 'Category', 'Score']]
+                rows += [[Paragraph(escape(s['dimension']), styles['BodyText']), s['category'], f"{s['score']}/5"]
+                         for s in highlights]
+                story.append(Table(rows, colWidths=[8 * cm, 6.5 * cm, 1.5 * cm], style=table_style))
+            else:
+                story.append(Paragraph(empty, styles['BodyText']))
+        
+        if item['ai_insights']:
+            story.append(Paragraph("AI-Powered Analysis", styles['Heading2']))
+            story.append(Paragraph(_paragraph_text(item['ai_insights']), styles['BodyText']))
+        
+        if item['recommendations']:
+            story.append(Paragraph("Actionable Recommendations", styles['Heading2']))
+            for number, recommendation in enumerate(item['recommendations'], 1):
+                story.append(Paragraph(f"<b>{number}.</b> {_paragraph_text(recommendation)}", styles['BodyText']))
+    
+    doc.build(story)
+    return buffer.getvalue()
+
+def _sheet_title(name, used):
+    """Make a unique, valid Excel sheet title"""
+    title = ''.join('_' if c in '[]:*?/\\' else c for c in name)[:31] or 'Use Case'
+    candidate, n = title, 2
+    while candidate.lower() in used:
+        suffix = f" ({n})"
+        candidate, n = title[:31 - len(suffix)] + suffix, n + 1
+    used.add(candidate.lower())
+    return candidate
+
+def _render_xlsx(items):
+    """Render items as an Excel workbook"""
+    from openpyxl import Workbook
+    from openpyxl.chart import BarChart, Reference
+    from openpyxl.styles import Alignment, Font, PatternFill
+    
+    bold = Font(bold=True)
+    header_font = Font(bold=True, color='FFFFFF')
+    header_fill = PatternFill('solid', fgColor='1F77B4')
+    wrap = Alignment(wrap_text=True, vertical='top')
+    
+    def header(ws, row, values):
+        for column, value in enumerate(values, 1):
+            cell = ws.cell(row=row, column=column, value=value)
+            cell.font, cell.fill = header_font, header_fill
+    
+    workbook = Workbook()
+    overview = workbook.active
+    overview.title = 'Overview'
+    overview['A1'] = REPORT_TITLE
+    overview['A1'].font = Font(bold=True, size=16)
+    overview['A2'] = f"Generated {datetime.now():%Y-%m-%d %H:%M}"
+    header(overview, 4, ['Use Case ID', 'Name', 'Business Unit', 'Process Owner', 'Score', 'Status',
+                         'Assessed On'])
+    for row, item in enumerate(items, 5):
+        use_case = item['use_case']
+        for column, value in enumerate([use_case['use_case_id'], use_case['name'], use_case['business_unit'],
+                                        use_case['process_owner'], item['normalized_score'],
+                                        item['interpretation'], item['assessed_on']], 1):
+            overview.cell(row=row, column=column, value=value)
+    for column, width in zip('ABCDEFG', (16, 40, 22, 22, 8, 40, 12)):
+        overview.column_dimensions[column].width = width
+    
+    used = {'overview'}
+    for item in items:
+        use_case = item['use_case']
+        ws = workbook.create_sheet(_sheet_title(use_case['use_case_id'], used))
+        ws['A1'] = f"{use_case['use_case_id']} - {use_case['name']}"
+        ws['A1'].font = Font(bold=True, size=14)
+        ws['A2'] = use_case['description']
+        rows = [
+            ('Business Unit', use_case['business_unit']),
+            ('Process Owner', use_case['process_owner']),
+            ('Assessed On', item['assessed_on']),
+            ('Overall Readiness Score', item['normalized_score']),
+            ('Status', item['interpretation']),
+        ]
+        for row, (label, value) in enumerate(rows, 4):
+            ws.cell(row=row, column=1, value=label).font = bold
+            ws.cell(row=row, column=2, value=value)
+        ws['B7'].font = Font(bold=True, size=14, color=item['color'].lstrip('#'))
+        
+        # Category table with a native chart next to it
+        row = 10
+        ws.cell(row=row - 1, column=1, value='Category Breakdown').font = bold
+        header(ws, row, ['Category', 'Total', 'Max', 'Score (0-100)'])
+        for offset, (category, data) in enumerate(item['category_scores'].items(), 1):
+            for column, value in enumerate([category, data['total'], data['max'], data['normalized']], 1):
+                ws.cell(row=row + offset, column=column, value=value)
+        last = row + len(item['category_scores'])
+        if item['category_scores']:
+            chart = BarChart()
+            chart.type = 'bar'
+            chart.title = 'Category Performance'
+            chart.legend = None
+            chart.y_axis.scaling.min, chart.y_axis.scaling.max = 0, 100
+            chart.add_data(Reference(ws, min_col=4, min_row=row, max_row=last), titles_from_data=True)
+            chart.set_categories(Reference(ws, min_col=1, min_row=row + 1, max_row=last))
+            chart.width, chart.height = 16, 7.5
+            ws.add_chart(chart, 'F4')
+        row = max(last, 22) + 2
+        
+        for title, highlights in (("Top Strengths", item['strengths']), ("Key Challenges", item['challenges'])):
+            ws.cell(row=row, column=1, value=title).font = bold
+            row += 1
+            for s in highlights:
+                ws.cell(row=row, column=1, value=s['dimension'])
+                ws.cell(row=row, column=2, value=f"{s['score']}/5")
+                ws.cell(row=row, column=3, value=s['category'])
+                row += 1
+            if not highlights:
+                ws.cell(row=row, column=1, value='None')
+                row += 1
+            row += 1
+        
+        if item['ai_insights']:
+            ws.cell(row=row, column=1, value='AI-Powered Analysis').font = bold
+            ws.merge_cells(start_row=row + 1, start_column=1, end_row=row + 1, end_column=8)
+            cell = ws.cell(row=row + 1, column=1, value=item['ai_insights'])
+            cell.alignment = wrap
+            ws.row_dimensions[row + 1].height = min(400, 15 * (len(item['ai_insights']) // 100 + 2))
+            row += 3
+        
+        if item['recommendations']:
+            ws.cell(row=row, column=1, value='Actionable Recommendations').font = bold
+            row += 1
+            for number, recommendation in enumerate(item['recommendations'], 1):
+                ws.cell(row=row, column=1, value=f"{number}. {recommendation}")
+                row += 1
+            row += 1
+        
+        ws.cell(row=row, column=1, value='All Dimension Scores').font = bold
+        header(ws, row + 1, ['Dimension', 'Category', 'Score (1-5)', 'Weight', 'Weighted Score'])
+        for offset, score in enumerate(item['scores'], 2):
+            for column, key in enumerate(('dimension', 'category', 'score', 'weight', 'weighted_score'), 1):
+                ws.cell(row=row + offset, column=column, value=score[key])
+        
+        for column, width in zip('ABCDE', (42, 14, 14, 10, 15)):
+            ws.column_dimensions[column].width = width
+    
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+def render_report(file_format, items, charts=None):
+    """
+    Render a report; runs in a worker process
+    
+    Args:
+        file_format: One of REPORT_FORMATS
+        items: Items from build_report_items
+        charts: PDF only: already rendered chart PNGs keyed by chart_key
+    
+    Returns:
+        tuple: (report bytes, charts rendered by this call keyed by chart_key)
+    """
+    if file_format == 'xlsx':
+        return _render_xlsx(items), {}
+    
+    charts = dict(charts or {})
+    rendered = {}
+    for item in items:
+        key = item['chart_key']
+        if key not in charts and item['category_scores']:
+            charts[key] = rendered[key] = _render_chart(item['category_scores'])
+    return _render_pdf(items, charts), rendered
+
+def _get_executor():
+    """Lazily create the process-wide report worker pool"""
+    global _executor
+    with _lock:
+        if _executor is None:
+            # Spawned workers don't inherit the Streamlit server's threads and locks
+            _executor = ProcessPoolExecutor(max_workers=REPORT_WORKERS,
+                                            mp_context=multiprocessing.get_context('spawn'))
+        return _executor
+
+def _discard_executor(executor):
+    """Drop a broken worker pool so the next submission starts a fresh one"""
+    global _executor
+    with _lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+def _submit_render(file_format, items, charts):
+    """
+    Queue a render on the worker pool
+    
+    A pool broken by a dead worker (killed, out of memory, failed to spawn)
+    is replaced and the render retried once; if that fails too, the error
+    is returned in the future so it shows up as a failed job.
+    """
+    def drop_if_broken(future):
+        # A worker dying mid-render breaks the pool for every later job too
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            _discard_executor(executor)
+    
+    for _ in range(2):
+        executor = _get_executor()
+        try:
+            future = executor.submit(render_report, file_format, items, charts)
+        except BrokenProcessPool as e:
+            _discard_executor(executor)
+            error = e
+        except Exception as e:
+            error = e
+            break
+        else:
+            future.add_done_callback(drop_if_broken)
+            return future
+    
+    future = Future()
+    future.set_exception(error)
+    return future
+
+def _report_key(file_format, items):
+    """Cache key: the rendered content, so unchanged assessments hit the cache"""
+    content = json.dumps(items, sort_keys=True, default=str).encode('utf-8')
+    return file_format, hashlib.sha256(content).hexdigest()
+
+def _remember(cache, key, value, max_entries):
+    """Store a value in an LRU dictionary"""
+    with _lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > max_entries:
+            cache.popitem(last=False)
+
+def _cached_report(key):
+    """Get a rendered report from the cache"""
+    with _lock:
+        data = _reports.get(key)
+        if data is not None:
+            _reports.move_to_end(key)
+        return data
+
+def _known_charts(items):
+    """Previously rendered charts for these items"""
+    with _lock:
+        return {item['chart_key']: _charts[item['chart_key']] for item in items
+                if item['chart_key'] in _charts}
+
+def _store(key, data, rendered):
+    """Cache a rendered report and the charts it produced"""
+    _remember(_reports, key, data, REPORT_CACHE_MAX_ENTRIES)
+    for chart_key, chart in rendered.items():
+        if chart is not None:
+            _remember(_charts, chart_key, chart, REPORT_CHART_CACHE_MAX_ENTRIES)
+
+def _store_result(key, future):
+    """Done callback: cache a successful background render"""
+    if not future.cancelled() and future.exception() is None:
+        _store(key, *future.result())
+
+def submit_report(db, use_case_ids, file_format='pdf', framework=None):
+    """
+    Start rendering a report in the background
+    
+    Args:
+        db: Database instance
+        use_case_ids: Use case ids in report order
+        file_format: One of REPORT_FORMATS
+        framework: Framework for dimension order (defaults to load_framework())
+    
+    Returns:
+        str: Job id for get_report_job
+    """
+    if file_format not in REPORT_FORMATS:
+        raise ValueError(f"Unsupported format: {file_format}")
+    items = build_report_items(db, use_case_ids, framework)
+    if not items:
+        raise ValueError("None of the selected use cases has been assessed")
+    
+    key = _report_key(file_format, items)
+    data = _cached_report(key)
+    if data is not None:
+        future = Future()
+        future.set_result((data, {}))
+    else:
+        charts = _known_charts(items) if file_format == 'pdf' else {}
+        future = _submit_render(file_format, items, charts)
+        future.add_done_callback(lambda f: _store_result(key, f))
+    
+    job_id = uuid.uuid4().hex
+    with _lock:
+        _jobs[job_id] = {
+            'future': future,
+            'file_name': report_file_name(items, file_format),
+            'mime': REPORT_MIME_TYPES[file_format],
+            'use_cases': len(items),
+            'cached': data is not None,
+            'submitted_at': time.perf_counter()
+        }
+        while len(_jobs) > REPORT_MAX_JOBS:
+            _jobs.popitem(last=False)
+    return job_id
+
+def get_report_job(job_id):
+    """
+    Get the status of a report job
+    
+    Args:
+        job_id: Id from submit_report
+    
+    Returns:
+        dict: 'status' ('queued', 'running', 'done' or 'failed'), 'file_name',
+            'mime', 'use_cases', 'cached' and 'seconds' since submission, plus
+            'data' when done or 'error' when failed; None for an unknown job
+    """
+    with _lock:
+        job = _jobs.get(job_id)
+    if job is None:
+        return None
+    
+    future = job['future']
+    status = {key: job[key] for key in ('file_name', 'mime', 'use_cases', 'cached')}
+    status['seconds'] = time.perf_counter() - job['submitted_at']
+    if not future.done():
+        status['status'] = 'running' if future.running() else 'queued'
+    elif future.exception() is not None:
+        status['status'] = 'failed'
+        status['error'] = str(future.exception())
+    else:
+        status['status'] = 'done'
+        status['data'] = future.result()[0]
+    return status
+
+def generate_report(db, use_case_ids, file_format='pdf', framework=None):
+    """
+    Render a report in this process (for scripts and the command line)
+    
+    Args:
+        db: Database instance
+        use_case_ids: Use case ids in report order
+        file_format: One of REPORT_FORMATS
+        framework: Framework for dimension order (defaults to load_framework())
+    
+    Returns:
+        tuple: (file name, report bytes)
+    """
+    if file_format not in REPORT_FORMATS:
+        raise ValueError(f"Unsupported format: {file_format}")
+    items = build_report_items(db, use_case_ids, framework)
+    if not items:
+        raise ValueError("None of the selected use cases has been assessed")
+    
+    key = _report_key(file_format, items)
+    data = _cached_report(key)
+    if data is None:
+        data, rendered = render_report(file_format, items, _known_charts(items))
+        _store(key, data, rendered)
+    return report_file_name(items, file_format), data
@@ -0,0 +1,101 @@
+"""
+Sensitivity analysis - What-if weight changes applied incrementally to the portfolio
+"""
+
+import numpy as np
+
+from utils.calculations import MAX_DIMENSION_SCORE, normalize_totals
+
+class WeightSensitivity:
+    """
+    Portfolio scores under adjustable dimension weights
+    
+    Weighted totals are cached per use case. Changing one weight adds
+    (new - old) * that dimension's column to the totals and maxima, an
+    O(use_cases) update, instead of re-scoring every dimension of every use
+    case.
+    
+    Attributes:
+        portfolio: Portfolio the analysis runs on
+        weights: (dimensions,) current weights
+        totals: (use_cases,) weighted totals under the current weights
+        max_totals: (use_cases,) highest achievable totals under the current weights
+    """
+    
+    def __init__(self, portfolio):
+        """
+        Args:
+            portfolio: Portfolio from utils.ranking.get_portfolio
+        """
+        self.portfolio = portfolio
+        self.baseline_normalized = portfolio.scores.normalized
+        self.baseline_ranks = competition_ranks(self.baseline_normalized)
+        self.reset()
+    
+    def reset(self):
+        """Restore the framework's default weights"""
+        self.weights = self.portfolio.weights.copy()
+        self.totals = self.portfolio.scores.totals.astype(np.int64)
+        self.max_totals = self.portfolio.scores.max_totals.astype(np.int64)
+    
+    def set_weight(self, dimension_index, weight):
+        """
+        Change one dimension's weight, updating totals by the delta
+        
+        Args:
+            dimension_index: Column of the dimension in the framework
+            weight: New weight
+        """
+        delta = int(weight) - self.weights[dimension_index].item()
+        if delta == 0:
+            return
+        
+        self.totals += delta * self.portfolio.score_matrix[:, dimension_index]
+        self.max_totals += delta * MAX_DIMENSION_SCORE * self.portfolio.mask[:, dimension_index]
+        self.weights[dimension_index] = weight
+    
+    def changed_weights(self):
+        """Get {dimension index: (default weight, current weight)} for changed weights"""
+        return {
+            j: (self.portfolio.weights[j].item(), self.weights[j].item())
+            for j in np.flatnonzero(self.weights != self.portfolio.weights).tolist()
+        }
+    
+    def normalized(self):
+        """Normalized scores (0-100) under the current weights"""
+        return normalize_totals(self.totals, self.max_totals)
+    
+    def results(self):
+        """
+        Compare every use case against the default weights
+        
+        Returns:
+            dict: (use_cases,) arrays 'use_case_ids', 'baseline_score', 'score',
+                'score_change', 'baseline_rank', 'rank' and 'rank_change'
+                (positive when the use case moves up)
+        """
+        normalized = self.normalized()
+        ranks = competition_ranks(normalized)
+        return {
+            'use_case_ids': self.portfolio.use_case_ids,
+            'baseline_score': self.baseline_normalized,
+            'score': normalized,
+            'score_change': normalized - self.baseline_normalized,
+            'baseline_rank': self.baseline_ranks,
+            'rank': ranks,
+            'rank_change': self.baseline_ranks - ranks
+        }
+
+def competition_ranks(values):
+    """
+    Rank values highest first, giving ties the same rank ("1224" ranking)
+    
+    Args:
+        values: (n,) array
+    
+    Returns:
+        numpy.ndarray: (n,) ranks starting at 1
+    """
+    values = np.asarray(values)
+    ascending = np.sort(values)
+    return len(values) - np.searchsorted(ascending, values, side='right') + 1
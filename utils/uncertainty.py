@@ -0,0 +1,279 @@
+"""
+Uncertainty simulation - Monte Carlo confidence intervals for portfolio scores
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.calculations import MAX_DIMENSION_SCORE, normalize_totals
+from utils.framework_loader import load_framework
+from utils.ranking import get_portfolio
+
+# Default number of Monte Carlo samples
+UNCERTAINTY_SAMPLES = int(os.getenv('UNCERTAINTY_SAMPLES', '2000'))
+
+# Samples simulated at once; memory is bounded by chunk size x use cases
+UNCERTAINTY_CHUNK_SIZE = int(os.getenv('UNCERTAINTY_CHUNK_SIZE', '250'))
+
+# How a score is drawn from its plausible range
+DISTRIBUTIONS = ('uniform', 'triangular')
+
+class UncertaintyResult:
+    """
+    Summary of a Monte Carlo run over the portfolio
+    
+    Attributes:
+        use_case_ids: (use_cases,) array of use case ids, ascending
+        samples: Number of samples drawn
+        confidence: Confidence level of the interval (e.g. 0.9)
+        top_k: Size of the top group used for p_top_k
+        mean: (use_cases,) mean normalized score
+        median: (use_cases,) median normalized score
+        low: (use_cases,) lower bound of the confidence interval
+        high: (use_cases,) upper bound of the confidence interval
+        p_top_k: (use_cases,) probability of ranking in the top k
+        uncertain_use_cases: Number of use cases with at least one score range
+    """
+    
+    def __init__(self, use_case_ids, samples, confidence, top_k, mean, median, low, high,
+                 p_top_k, uncertain_use_cases):
+        self.use_case_ids = use_case_ids
+        self.samples = samples
+        self.confidence = confidence
+        self.top_k = top_k
+        self.mean = mean
+        self.median = median
+        self.low = low
+        self.high = high
+        self.p_top_k = p_top_k
+        self.uncertain_use_cases = uncertain_use_cases
+    
+    def get(self, use_case_id):
+        """
+        Get the results for one use case
+        
+        Args:
+            use_case_id: Use case id
+        
+        Returns:
+            dict: 'mean', 'median', 'low', 'high' and 'p_top_k', or None if
+                the use case is not in the portfolio
+        """
+        i = np.searchsorted(self.use_case_ids, use_case_id)
+        if i >= len(self.use_case_ids) or self.use_case_ids[i] != use_case_id:
+            return None
+        return {
+            'mean': self.mean[i].item(),
+            'median': self.median[i].item(),
+            'low': self.low[i].item(),
+            'high': self.high[i].item(),
+            'p_top_k': self.p_top_k[i].item()
+        }
+
+def _range_cdf(lows, highs, modes, distribution):
+    """
+    Cumulative probabilities of each uncertain cell's range, shape (cells, 4)
+    
+    Column j holds P(score <= low + j); columns past the range are 1, so a
+    uniform draw u maps to low + (number of columns with u > cdf).
+    """
+    offsets = np.arange(MAX_DIMENSION_SCORE - 1)
+    values = lows[:, np.newaxis] + offsets
+    
+    if distribution == 'uniform':
+        span = (highs - lows + 1)[:, np.newaxis]
+        cdf = (offsets + 1) / span
+    elif distribution == 'triangular':
+        # Continuous triangle over [low - 0.5, high + 0.5] peaking at the
+        # recorded score, rounded to whole scores
+        a = (lows - 0.5)[:, np.newaxis]
+        b = (highs + 0.5)[:, np.newaxis]
+        c = modes[:, np.newaxis].astype(np.float64)
+        x = np.clip(values + 0.5, a, b)
+        cdf = np.where(
+            x <= c,
+            (x - a) ** 2 / ((b - a) * (c - a)),
+            1 - (b - x) ** 2 / np.maximum((b - a) * (b - c), 1e-12)
+        )
+    else:
+        raise ValueError(f"Unknown distribution: {distribution}")
+    
+    return np.where(values >= highs[:, np.newaxis], 1.0, cdf).astype(np.float32)
+
+def _draw_steps(rng, cdf, shape):
+    """Draw how far above its low each uncertain cell scores, shape (samples, cells)"""
+    u = rng.random(shape, dtype=np.float32)
+    steps = np.zeros(shape, dtype=np.int8)
+    for j in range(cdf.shape[1]):
+        steps += u > cdf[:, j]
+    return steps
+
+def _quantile_from_histogram(cumulative, q, samples):
+    """Nearest-rank quantile of each row of a cumulative 0-100 score histogram"""
+    target = max(1, int(np.ceil(q * samples)))
+    return np.argmax(cumulative >= target, axis=1)
+
+def simulate_portfolio(portfolio, samples=UNCERTAINTY_SAMPLES, confidence=0.9, top_k=10,
+                       distribution='uniform', seed=None, chunk_size=UNCERTAINTY_CHUNK_SIZE):
+    """
+    Run a vectorized Monte Carlo simulation over the whole portfolio
+    
+    Each dimension with a plausible range is redrawn in every sample; all
+    other scores stay fixed. Only use cases with a range are simulated: the
+    weighted deltas of their uncertain cells are added to the cached
+    portfolio totals, so a chunk of samples costs O(chunk x uncertain cells).
+    Use cases without ranges have constant scores and only take part in the
+    per-sample top-k threshold. Simulated scores are accumulated into
+    histograms instead of being kept.
+    
+    Args:
+        portfolio: Portfolio from utils.ranking.get_portfolio
+        samples: Number of samples
+        confidence: Confidence level of the reported interval
+        top_k: Size of the top group for rank-stability probabilities
+        distribution: 'uniform' over the range, or 'triangular' peaking at
+            the recorded score
+        seed: Optional random seed
+        chunk_size: Samples simulated at once
+    
+    Returns:
+        UncertaintyResult: Score intervals and top-k probabilities
+    """
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"Unknown distribution: {distribution}")
+    
+    n = len(portfolio)
+    k = min(top_k, n)
+    rng = np.random.default_rng(seed)
+    
+    # Uncertain cells in row-major order, so each use case's cells are contiguous
+    rows, columns = np.nonzero(portfolio.mask & (portfolio.low_matrix != portfolio.high_matrix))
+    lows = portfolio.low_matrix[rows, columns]
+    highs = portfolio.high_matrix[rows, columns]
+    recorded = portfolio.score_matrix[rows, columns]
+    cell_weights = portfolio.weights[columns]
+    uncertain, row_starts = np.unique(rows, return_index=True)
+    cdf = _range_cdf(lows, highs, recorded, distribution)
+    # A cell drawn `steps` above its low changes the total by low_delta + steps * weight;
+    # float32 is exact for these small integer sums and halves the memory traffic
+    step_weights = cell_weights.astype(np.float32)
+    low_deltas = ((lows - recorded) * cell_weights).astype(np.float32)
+    
+    totals = portfolio.scores.totals.astype(np.int64)
+    max_totals = portfolio.scores.max_totals
+    # Rank on the unrounded ratio so rounding doesn't create ties
+    ratio = np.divide(totals, max_totals, out=np.zeros(n), where=max_totals > 0)
+    
+    certain = np.ones(n, dtype=bool)
+    certain[uncertain] = False
+    certain_ratio = ratio[certain]
+    # Only the k best certain use cases can set a sample's top-k threshold
+    k_certain = min(k, len(certain_ratio))
+    certain_top = np.sort(certain_ratio)[len(certain_ratio) - k_certain:]
+    
+    u = len(uncertain)
+    u_totals = totals[uncertain]
+    u_max = max_totals[uncertain]
+    histogram = np.zeros(u * 101, dtype=np.int64)
+    offsets = np.arange(u) * 101
+    score_sums = np.zeros(u, dtype=np.float64)
+    top_counts = np.zeros(n, dtype=np.int64)
+    thresholds = []
+    
+    for start in range(0, samples, chunk_size):
+        size = min(chunk_size, samples - start)
+        
+        sample_ratio = np.broadcast_to(ratio[uncertain], (size, u))
+        if u:
+            deltas = _draw_steps(rng, cdf, (size, len(rows))) * step_weights + low_deltas
+            sample_totals = u_totals + np.add.reduceat(deltas, row_starts, axis=1)
+            normalized = np.clip(normalize_totals(sample_totals, u_max), 0, 100)
+            histogram += np.bincount((normalized + offsets).ravel(), minlength=u * 101)
+            score_sums += normalized.sum(axis=0)
+            sample_ratio = np.divide(sample_totals, u_max, out=np.zeros(sample_totals.shape),
+                                     where=u_max > 0)
+        
+        if k:
+            candidates = np.concatenate([np.broadcast_to(certain_top, (size, k_certain)), sample_ratio], axis=1)
+            m = candidates.shape[1]
+            threshold = np.partition(candidates, m - k, axis=1)[:, m - k]
+            top_counts[uncertain] += (sample_ratio >= threshold[:, np.newaxis]).sum(axis=0)
+            thresholds.append(threshold)
+    
+    if k and samples:
+        # A certain use case is in the top k whenever the threshold is at or below its ratio
+        thresholds = np.sort(np.concatenate(thresholds))
+        top_counts[certain] = np.searchsorted(thresholds, certain_ratio, side='right')
+    
+    # Certain use cases keep their recorded score in every sample
+    normalized = portfolio.scores.normalized
+    mean = normalized.astype(np.float64)
+    median, low, high = normalized.copy(), normalized.copy(), normalized.copy()
+    if u and samples:
+        cumulative = np.cumsum(histogram.reshape(u, 101), axis=1)
+        tail = (1 - confidence) / 2
+        mean[uncertain] = score_sums / samples
+        median[uncertain] = _quantile_from_histogram(cumulative, 0.5, samples)
+        low[uncertain] = _quantile_from_histogram(cumulative, tail, samples)
+        high[uncertain] = _quantile_from_histogram(cumulative, 1 - tail, samples)
+    
+    return UncertaintyResult(
+        use_case_ids=portfolio.use_case_ids,
+        samples=samples,
+        confidence=confidence,
+        top_k=k,
+        mean=mean,
+        median=median,
+        low=low,
+        high=high,
+        p_top_k=top_counts / max(samples, 1),
+        uncertain_use_cases=u
+    )
+
+# Simulation results kept for different parameters (e.g. each page's top_k)
+UNCERTAINTY_CACHE_SIZE = 8
+
+# Results keyed by database path, framework and parameters, with the cache version they came from
+_results = OrderedDict()
+_results_lock = threading.Lock()
+
+def get_uncertainty(db, samples=UNCERTAINTY_SAMPLES, confidence=0.9, top_k=10,
+                    distribution='uniform', framework=None):
+    """
+    Get simulation results for the portfolio, re-running only after the database changes
+    
+    Args:
+        db: Database instance
+        samples: Number of samples
+        confidence: Confidence level of the reported interval
+        top_k: Size of the top group for rank-stability probabilities
+        distribution: One of DISTRIBUTIONS
+        framework: Framework (defaults to load_framework())
+    
+    Returns:
+        UncertaintyResult: Shared, read-only results
+    """
+    framework = framework or load_framework()
+    version = db.cache.version
+    key = (db.pool.db_path, framework, samples, confidence, top_k, distribution)
+    
+    with _results_lock:
+        cached = _results.get(key)
+        if cached is not None and cached[0] == version:
+            _results.move_to_end(key)
+            return cached[1]
+    
+    # A fixed seed keeps the figures stable until the portfolio changes
+    result = simulate_portfolio(get_portfolio(db, framework), samples, confidence, top_k,
+                                distribution, seed=0)
+    with _results_lock:
+        # Results from an older version of this database can't be hit again
+        for stale in [k for k, (v, _) in _results.items() if k[0] == key[0] and v != version]:
+            del _results[stale]
+        _results[key] = (version, result)
+        while len(_results) > UNCERTAINTY_CACHE_SIZE:
+            _results.popitem(last=False)
+    return result